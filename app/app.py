@@ -8,17 +8,32 @@ and Economic Activity.
 The app features two main views:
 1. Pillar view: Shows detailed breakdown of each pillar's components
 2. Connections view: Interactive visualization of relationships between pillars
+
+Module-level state is built once at import and is read-only afterwards, so the
+app can be served by threaded gunicorn workers (see gunicorn.conf.py). The
+catalogs and indicator histories are swapped as a whole when a new data
+snapshot is published (see snapshots.py).
 """
 
 # --- Imports ---
 import dash
-from dash import html, dcc, callback, Input, Output, State
+from flask import g, has_request_context
+from dash import html, dcc, callback, Input, Output, State, MATCH
 import dash_bootstrap_components as dbc  # UI components
 import plotly.graph_objects as go  # Interactive plotting
+from plotly.subplots import make_subplots
 import numpy as np  # Numerical operations
-import pandas as pd
+import os
+import re
+from types import MappingProxyType
 from dash import dash_table
 
+from timeseries import decimated_series  # Downsampled indicator histories
+from snapshots import Snapshot, SnapshotManager  # Hot-swappable data snapshots
+from network import NODE_KINDS, build_influence_graph  # Sparse influence network
+from simulation import make_shock, simulate, transfer_matrix  # What-if shock propagation
+from profiling import install_profiler  # Opt-in request profiling
+
 # --- App Initialization ---
 app = dash.Dash(
     __name__,
@@ -28,6 +43,32 @@ app = dash.Dash(
 
 
 # --- Helper Functions ---
+def freeze(obj):
+    """Recursively turn dicts into read-only mappings and lists into tuples.
+
+    Module-level data is shared by every request thread, so it is frozen
+    to make accidental per-request mutation raise instead of leaking.
+    """
+    if isinstance(obj, dict):
+        return MappingProxyType({key: freeze(value) for key, value in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(value) for value in obj)
+    return obj
+
+
+def current_snapshot():
+    """The data snapshot pinned to the current request, or the latest one."""
+    if has_request_context() and 'snapshot' in g:
+        return g.snapshot
+    return snapshots.current
+
+
+def table_page(df):
+    """DataTable records and columns for a catalog DataFrame."""
+    records = df.astype(object).where(df.notna(), None).to_dict('records')
+    return records, [{'name': col, 'id': col} for col in df.columns]
+
+
 def get_rgba_color(bootstrap_color, alpha=0.1):
     """Convert Bootstrap color names to RGBA values."""
     color_map = {
@@ -75,9 +116,84 @@ def create_data_tables_view():
         ], fluid=True)
     ])
 
+def create_comparison_view():
+    """Create the region comparison view layout."""
+    source = current_snapshot().history
+    variables = source.variables() if source is not None else []
+
+    return html.Div([
+        dbc.Container([
+            # Title
+            html.H3("Region Comparison", className="mb-4"),
+
+            # Variable and region selectors
+            dbc.Row([
+                dbc.Col([
+                    dcc.Dropdown(
+                        id="compare-variables",
+                        options=[{"label": v, "value": v} for v in variables],
+                        value=variables[:1],
+                        multi=True,
+                        placeholder="Select variables"
+                    )
+                ], width=12, md=6),
+                dbc.Col([
+                    dcc.Dropdown(
+                        id="compare-regions",
+                        multi=True,
+                        placeholder="Select regions"
+                    )
+                ], width=12, md=6)
+            ], className="mb-3"),
+
+            # Empty state until histories are loaded
+            html.P(
+                "No indicator histories are loaded yet.",
+                className="text-muted",
+                style={} if source is None else {"display": "none"}
+            ),
+
+            # Small multiples, one panel per variable
+            dcc.Graph(
+                id="compare-graph",
+                figure=go.Figure(),
+                config={'displayModeBar': False}
+            ),
+
+            # Pixel width of the graph, measured in the browser
+            dcc.Store(id="compare-width", data=COMPARE_DEFAULT_WIDTH),
+
+            # Zoomed x range, kept while variables and regions change
+            dcc.Store(id="compare-window")
+        ], fluid=True)
+    ])
+
 # --- Data Structures ---
+# Region comparison view settings
+COMPARE_COLUMNS = 2  # Panels per row in the small-multiples grid
+COMPARE_DEFAULT_WIDTH = 1200  # Fallback plot width in pixels
+COMPARE_PANEL_HEIGHT = 250
+COMPARE_DEFAULT_REGIONS = 20  # Regions preselected when variables change
+
+# Influence network node pickers
+NODE_SEARCH_LIMIT = 50  # Options sent per keystroke in a node dropdown
+SHOCKABLE_KINDS = ("component", "variable")
+
+# Shock simulator settings
+SHOCK_DAMPING = 0.5  # Share of a node's change passed on each period
+SHOCK_MAX_PERIODS = 100
+SHOCK_STREAM_MS = 400  # Delay between streamed periods
+
+# Catalog files behind the Data Tables view
+COMPONENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'components')
+CATALOG_FILES = MappingProxyType({
+    'pbc': os.path.join(COMPONENTS_DIR, 'pbc.csv'),
+    'hsc': os.path.join(COMPONENTS_DIR, 'hsc.csv'),
+    'ea': os.path.join(COMPONENTS_DIR, 'ea.csv')
+})
+
 # Pillar data defines the hierarchical structure of each pillar
-pillars_data = {
+pillars_data = freeze({
     "pbc": {  # Place-based Conditions
         "title": "Place-based Conditions",
         "color": "primary",
@@ -216,7 +332,7 @@ pillars_data = {
             }
         ]
     }
-}
+})
 
 
 def create_connection_info():
@@ -291,6 +407,22 @@ def create_connection_info():
     }
 
 
+# Catalogs and indicator histories come from the published data snapshot
+# (see snapshots.py); without one, the bundled catalogs and HISTORY_STORE
+HISTORY_STORE = os.environ.get('HISTORY_STORE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'history'))
+SNAPSHOT_ROOT = os.environ.get('SNAPSHOT_ROOT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'snapshots'))
+snapshots = SnapshotManager(
+    SNAPSHOT_ROOT,
+    fallback=Snapshot('bundled', CATALOG_FILES, HISTORY_STORE),
+    # Series cached from the previous snapshot's histories are never read again
+    on_swap=lambda snapshot: decimated_series.cache_clear()
+)
+
+# Influence network over pillars, subjects, components and variables
+influence_graph = build_influence_graph(pillars_data, create_connection_info())
+shock_matrix = transfer_matrix(influence_graph, damping=SHOCK_DAMPING)
+
+
 # --- Layout Components ---
 def create_component(title, variables):
     """Create a collapsible component showing variables."""
@@ -305,26 +437,42 @@ def create_component(title, variables):
     ], className="border-start ps-3 py-1")
 
 
+def create_subject_body(subject):
+    """Create the components listed inside an opened subject."""
+    return [
+        create_component(comp['title'], comp['variables'])
+        for comp in subject['components']
+    ]
+
+
+def subject_id(part, pillar_id, index):
+    """Pattern-matching id of one part of a subject ("button", "collapse", ...)."""
+    return {"type": f"subject-{part}", "pillar": pillar_id, "index": index}
+
+
 def create_subject(pillar_id, subject, index):
-    """Create a collapsible subject section containing components."""
+    """Create a collapsible subject section containing components.
+
+    The components are left out of the initial layout and filled in by
+    toggle_collapse the first time the subject is opened; the "rendered"
+    store records that they have arrived.
+    """
     return html.Div([
         dbc.Button(
             [
                 html.Span(subject['title'], className="me-2 fw-semibold"),
                 html.I(className="fas fa-chevron-right")
             ],
-            id=f"{pillar_id}-subject-{index}-button",
+            id=subject_id("button", pillar_id, index),
             color="link",
             className="text-start p-0 text-decoration-none text-dark w-100 d-flex justify-content-between align-items-center"
         ),
         dbc.Collapse(
-            html.Div([
-                create_component(comp['title'], comp['variables'])
-                for comp in subject['components']
-            ], className="mt-2"),
-            id=f"{pillar_id}-subject-{index}-collapse",
+            html.Div(id=subject_id("body", pillar_id, index), className="mt-2"),
+            id=subject_id("collapse", pillar_id, index),
             is_open=False
-        )
+        ),
+        dcc.Store(id=subject_id("rendered", pillar_id, index), data=False)
     ], className="border-start ps-3 py-2")
 
 
@@ -495,10 +643,129 @@ def create_connections_view():
                         style={"display": "none"}
                     )
                 ], width=12),
+            ], className="mb-4"),
+
+            # Influence network query panel
+            dbc.Row([
+                dbc.Col([
+                    create_network_query_panel()
+                ], width=12),
+            ], className="mb-4"),
+
+            # What-if shock simulator
+            dbc.Row([
+                dbc.Col([
+                    create_shock_simulator_panel()
+                ], width=12),
             ])
         ], fluid=True)
     ])
 
+
+def node_option(key):
+    """Dropdown option for an influence network node."""
+    label = influence_graph.labels[influence_graph.ids[key]]
+    return {"label": f"{label} ({key.replace('/', ' › ')})", "value": key}
+
+
+def search_node_options(search_value, selected, kinds=NODE_KINDS):
+    """Options for nodes whose label contains the search text.
+
+    The node dropdowns start out empty and load their options as the user
+    types, so the full node list is never sent to the browser. The selected
+    node is always kept so its label stays visible.
+    """
+    options = [node_option(selected)] if selected in influence_graph.ids else []
+    if not search_value:
+        return options
+    text = search_value.strip().lower()
+    for i, label in enumerate(influence_graph.labels):
+        if len(options) >= NODE_SEARCH_LIMIT:
+            break
+        key = influence_graph.keys[i]
+        if text in label.lower() and key != selected and influence_graph.kind(i) in kinds:
+            options.append(node_option(key))
+    return options
+
+
+def create_network_query_panel():
+    """Create the panel for querying the influence network."""
+    return dbc.Card([
+        dbc.CardBody([
+            html.H5("Explore Influence Paths", className="mb-3"),
+            dbc.Row([
+                dbc.Col([
+                    dbc.Label("Node"),
+                    dcc.Dropdown(id="network-node", options=[], placeholder="Type to search nodes")
+                ], width=12, lg=6),
+                dbc.Col([
+                    dbc.Label("Query"),
+                    dbc.Select(
+                        id="network-query",
+                        options=[
+                            {"label": "What influences it", "value": "in"},
+                            {"label": "What it influences", "value": "out"},
+                            {"label": "Shortest path to", "value": "path"}
+                        ],
+                        value="in"
+                    )
+                ], width=6, lg=2),
+                dbc.Col([
+                    dbc.Label("Within hops"),
+                    dbc.Input(id="network-hops", type="number", min=1, max=10, step=1, value=3)
+                ], width=6, lg=2),
+                dbc.Col([
+                    dbc.Label("Show"),
+                    dbc.Select(
+                        id="network-kind",
+                        options=[{"label": "All nodes", "value": "all"}] +
+                                [{"label": f"{kind.title()}s", "value": kind} for kind in NODE_KINDS],
+                        value="variable"
+                    )
+                ], width=12, lg=2)
+            ], className="mb-3"),
+            dbc.Row([
+                dbc.Col([
+                    dbc.Label("Target"),
+                    dcc.Dropdown(id="network-target", options=[], placeholder="Type to search nodes")
+                ], width=12, lg=6)
+            ], id="network-target-row", className="mb-3", style={"display": "none"}),
+            html.Div(id="network-results")
+        ])
+    ], className="shadow-sm")
+
+def create_shock_simulator_panel():
+    """Create the panel for simulating shock propagation across pillars."""
+    first = next(key for i, key in enumerate(influence_graph.keys) if influence_graph.kind(i) in SHOCKABLE_KINDS)
+
+    return dbc.Card([
+        dbc.CardBody([
+            html.H5("What-if Shock Simulator", className="mb-3"),
+            dbc.Row([
+                dbc.Col([
+                    dbc.Label("Shock"),
+                    dcc.Dropdown(id="shock-node", options=[node_option(first)], value=first,
+                                 placeholder="Type to search components and variables")
+                ], width=12, lg=8),
+                dbc.Col([
+                    dbc.Label("Size (%)"),
+                    dbc.Input(id="shock-size", type="number", value=10)
+                ], width=4, lg=1),
+                dbc.Col([
+                    dbc.Label("Periods"),
+                    dbc.Input(id="shock-periods", type="number", min=1, max=SHOCK_MAX_PERIODS, step=1, value=12)
+                ], width=4, lg=1),
+                dbc.Col([
+                    dbc.Button("Run", id="shock-run", color="primary", className="w-100")
+                ], width=4, lg=2, className="d-flex align-items-end")
+            ], className="mb-3"),
+            dcc.Graph(id="shock-graph", figure=go.Figure(), config={'displayModeBar': False}),
+            dcc.Store(id="shock-results"),
+            dcc.Interval(id="shock-interval", interval=SHOCK_STREAM_MS, disabled=True)
+        ])
+    ], className="shadow-sm")
+
+
 # --- App Layout ---
 app.layout = html.Div([
     # URL location component
@@ -522,6 +789,7 @@ app.layout = html.Div([
             dbc.NavItem(dbc.NavLink("Pillars", href="/", active="exact")),
             dbc.NavItem(dbc.NavLink("Connections", href="/connections", active="exact")),
             dbc.NavItem(dbc.NavLink("Data Tables", href="/tables", active="exact")),
+            dbc.NavItem(dbc.NavLink("Compare", href="/compare", active="exact")),
         ], pills=True, className="mb-4"),
 
         # Main content area
@@ -547,45 +815,35 @@ def display_page(pathname):
         return create_connections_view()
     elif pathname == '/tables':
         return create_data_tables_view()
+    elif pathname == '/compare':
+        return create_comparison_view()
     return create_pillar_view()
 
 
 @app.callback(
-    # Dynamic outputs for all possible subject collapses
-    [Output(f"{pillar}-subject-{i}-collapse", "is_open")
-     for pillar in pillars_data.keys()
-     for i in range(len(pillars_data[pillar]["subjects"]))],
-    # Dynamic inputs for all possible subject buttons
-    [Input(f"{pillar}-subject-{i}-button", "n_clicks")
-     for pillar in pillars_data.keys()
-     for i in range(len(pillars_data[pillar]["subjects"]))],
-    # Dynamic states for all possible subject collapses
-    [State(f"{pillar}-subject-{i}-collapse", "is_open")
-     for pillar in pillars_data.keys()
-     for i in range(len(pillars_data[pillar]["subjects"]))]
+    [Output(subject_id("collapse", MATCH, MATCH), "is_open"),
+     Output(subject_id("body", MATCH, MATCH), "children"),
+     Output(subject_id("rendered", MATCH, MATCH), "data")],
+    [Input(subject_id("button", MATCH, MATCH), "n_clicks")],
+    [State(subject_id("collapse", MATCH, MATCH), "is_open"),
+     State(subject_id("rendered", MATCH, MATCH), "data")],
+    prevent_initial_call=True
 )
-def toggle_collapse(*args):
-    """Handle collapse toggling for pillar subjects."""
-    n = len(args) // 2
-    clicks = args[:n]
-    states = args[n:]
+def toggle_collapse(n_clicks, is_open, rendered):
+    """Handle collapse toggling for one pillar subject.
 
-    ctx = dash.callback_context
-    if not ctx.triggered:
-        return [False] * n
-
-    button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-    button_ids = [f"{pillar}-subject-{i}-button"
-                  for pillar in pillars_data.keys()
-                  for i in range(len(pillars_data[pillar]["subjects"]))]
-
-    try:
-        index = button_ids.index(button_id)
-        new_states = list(states)
-        new_states[index] = not states[index]
-        return new_states
-    except ValueError:
-        return states
+    Only the clicked subject's own state travels with the request. Its body
+    is sent the first time it opens (or again if that response was lost,
+    since the "rendered" flag arrives with it); after that the components
+    stay in the browser and only is_open changes.
+    """
+    subject = dash.callback_context.triggered_id
+    if not subject:
+        return dash.no_update, dash.no_update, dash.no_update
+    if is_open or rendered:
+        return not is_open, dash.no_update, dash.no_update
+    subjects = pillars_data[subject["pillar"]]["subjects"]
+    return True, create_subject_body(subjects[subject["index"]]), True
 
 
 @app.callback(
@@ -657,30 +915,181 @@ def update_connection_details(clickData, figure):
         new_figure
     )
 
+@callback(
+    Output('network-node', 'options'),
+    Input('network-node', 'search_value'),
+    State('network-node', 'value'),
+    prevent_initial_call=True
+)
+def update_network_node_options(search_value, selected):
+    """Load matching nodes into the network node dropdown as the user types."""
+    return search_node_options(search_value, selected)
+
+
+@callback(
+    Output('network-target', 'options'),
+    Input('network-target', 'search_value'),
+    State('network-target', 'value'),
+    prevent_initial_call=True
+)
+def update_network_target_options(search_value, selected):
+    """Load matching nodes into the path target dropdown as the user types."""
+    return search_node_options(search_value, selected)
+
+
+@callback(
+    Output('shock-node', 'options'),
+    Input('shock-node', 'search_value'),
+    State('shock-node', 'value'),
+    prevent_initial_call=True
+)
+def update_shock_node_options(search_value, selected):
+    """Load matching components and variables into the shock dropdown."""
+    return search_node_options(search_value, selected, SHOCKABLE_KINDS)
+
+
+@callback(
+    [Output('network-results', 'children'),
+     Output('network-target-row', 'style')],
+    [Input('network-node', 'value'),
+     Input('network-query', 'value'),
+     Input('network-hops', 'value'),
+     Input('network-kind', 'value'),
+     Input('network-target', 'value')]
+)
+def update_network_query(node_key, query, hops, kind, target_key):
+    """Answer neighbourhood and path queries over the influence network."""
+    graph = influence_graph
+    target_style = {} if query == 'path' else {'display': 'none'}
+    if node_key not in graph.ids:
+        return html.P("Select a node to explore.", className="text-muted"), target_style
+
+    node = graph.ids[node_key]
+
+    if query == 'path':
+        if target_key not in graph.ids:
+            return html.P("Select a target node.", className="text-muted"), target_style
+        path = graph.shortest_path(node, graph.ids[target_key])
+        if path is None:
+            return html.P("No path between these nodes.", className="text-muted"), target_style
+        return html.Div([
+            html.P(f"{len(path) - 1} hop(s):", className="mb-2"),
+            html.Ol([
+                html.Li([graph.labels[i], html.Span(f" {graph.kind(i)}", className="text-muted small")])
+                for i in path
+            ], className="ps-3")
+        ]), target_style
+
+    reached = graph.k_hop([node], int(hops or 1), direction=query)
+    matches = sorted(
+        (dist, graph.keys[i]) for i, dist in reached.items()
+        if kind == 'all' or graph.kind(i) == kind
+    )
+    if not matches:
+        return html.P("No matching nodes within this many hops.", className="text-muted"), target_style
+
+    return html.Div([
+        html.P(f"{len(matches)} node(s) found:", className="mb-2"),
+        html.Ul([
+            html.Li([
+                graph.labels[graph.ids[key]],
+                html.Span(f" {key.replace('/', ' › ')} · {dist} hop(s)", className="text-muted small")
+            ])
+            for dist, key in matches
+        ], className="ps-3")
+    ]), target_style
+
+
+@callback(
+    [Output('shock-results', 'data'),
+     Output('shock-interval', 'n_intervals'),
+     Output('shock-interval', 'disabled')],
+    Input('shock-run', 'n_clicks'),
+    [State('shock-node', 'value'),
+     State('shock-size', 'value'),
+     State('shock-periods', 'value')],
+    prevent_initial_call=True
+)
+def run_shock_simulation(n_clicks, node_key, size, periods):
+    """Simulate a shock and store the pillar-level response per period.
+
+    The influence network has no regional detail, so the response is the
+    same in every region.
+    """
+    if node_key not in influence_graph.ids or not size or not periods:
+        return None, 0, True
+    if influence_graph.kind(influence_graph.ids[node_key]) not in SHOCKABLE_KINDS:
+        return None, 0, True
+
+    # The browser's min/max are only a hint
+    periods = min(max(int(periods), 1), SHOCK_MAX_PERIODS)
+    shock = make_shock(influence_graph, node_key, size / 100)
+    pillar_ids = [influence_graph.ids[p] for p in pillars_data]
+    levels = simulate(shock_matrix, shock, periods, nodes=pillar_ids)
+
+    return {
+        "shock": influence_graph.labels[influence_graph.ids[node_key]],
+        "pillars": list(pillars_data),
+        "levels": (levels * 100).round(4).tolist()
+    }, 0, False
+
+
+@callback(
+    [Output('shock-graph', 'figure'),
+     Output('shock-interval', 'disabled', allow_duplicate=True)],
+    Input('shock-interval', 'n_intervals'),
+    State('shock-results', 'data'),
+    prevent_initial_call=True
+)
+def stream_shock_periods(n_intervals, results):
+    """Reveal the simulated response one period per interval tick."""
+    if not results:
+        return go.Figure(), True
+
+    levels = results["levels"]
+    shown = min((n_intervals or 0) + 1, len(levels))
+    colors = {'primary': 'rgb(13, 110, 253)', 'success': 'rgb(25, 135, 84)', 'danger': 'rgb(220, 53, 69)'}
+
+    fig = go.Figure()
+    for k, pillar_id in enumerate(results["pillars"]):
+        fig.add_trace(go.Scatter(
+            x=list(range(shown)),
+            y=[row[k] for row in levels[:shown]],
+            mode='lines+markers',
+            name=pillars_data[pillar_id]["title"],
+            line=dict(color=colors[pillars_data[pillar_id]["color"]], width=2)
+        ))
+
+    fig.update_layout(
+        title=f"Response to a shock in {results['shock']}",
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        xaxis=dict(title="Period", range=[-0.5, len(levels) - 0.5]),
+        yaxis=dict(title="Change (%)"),
+        height=350,
+        margin=dict(l=40, r=20, t=40, b=40)
+    )
+    return fig, shown >= len(levels)
+
+
 @callback(
     Output('data-table-container', 'children'),
     Input('table-selector', 'value')
 )
 def update_table(selected_table):
     """Update the displayed table based on selection."""
-    # Define file paths
-    table_files = {
-        'pbc': '/Users/ali/Dropbox/PhD/Webapp/ecosystem-dashboard/app/components/pbc.csv',
-        'hsc': '/Users/ali/Dropbox/PhD/Webapp/ecosystem-dashboard/app/components/hsc.csv',
-        'ea': '/Users/ali/Dropbox/PhD/Webapp/ecosystem-dashboard/app/components/ea.csv'
-    }
-
-    if selected_table not in table_files:
+    snapshot = current_snapshot()
+    if selected_table not in snapshot.catalog_files:
         return html.P("Please select a table to view.", className="text-muted")
 
-    # Read the selected CSV file directly into a DataFrame
-    df = pd.read_csv(table_files[selected_table])
+    # Validated catalog rows, cached with the snapshot they came from
+    records, columns = snapshot.derived(('table', selected_table), lambda: table_page(snapshot.catalog(selected_table)))
 
     # Display the table using dash_table.DataTable
     return dbc.Table(
         dash_table.DataTable(
-            data=df.to_dict('records'),
-            columns=[{'name': col, 'id': col} for col in df.columns],
+            data=records,
+            columns=columns,
             style_table={'overflowX': 'auto'},
             style_cell={
                 'textAlign': 'left',
@@ -707,6 +1116,122 @@ def update_table(selected_table):
         className='table-sm'
     )
 
+def parse_zoom_window(relayout_data):
+    """Extract the zoomed x range from relayoutData.
+
+    Returns (start, end) for a zoom, None for a reset to full range, and
+    dash.no_update for relayout events that do not touch the x axis.
+    """
+    if not relayout_data:
+        return dash.no_update
+    for key, value in relayout_data.items():
+        if re.fullmatch(r"xaxis\d*\.autorange", key) and value:
+            return None
+        match = re.fullmatch(r"(xaxis\d*)\.range\[0\]", key)
+        if match:
+            return value, relayout_data[f"{match.group(1)}.range[1]"]
+        if re.fullmatch(r"xaxis\d*\.range", key):
+            return tuple(value)
+    return dash.no_update
+
+
+def create_comparison_figure(source, variables, regions, width, window=None):
+    """Build the small-multiples figure from downsampled histories in `source`."""
+    n_cols = min(COMPARE_COLUMNS, len(variables))
+    n_rows = -(-len(variables) // n_cols)
+    fig = make_subplots(
+        rows=n_rows, cols=n_cols,
+        subplot_titles=variables,
+        shared_xaxes='all',
+        vertical_spacing=min(0.08, 0.3 / n_rows)
+    )
+
+    # One point per horizontal pixel of a panel
+    resolution = max(int(width) // n_cols, 10)
+    for k, variable in enumerate(variables):
+        series = decimated_series(source, variable, tuple(sorted(regions)), resolution, window)
+        for region, (x, y) in series.items():
+            fig.add_trace(go.Scattergl(
+                x=x, y=y,
+                mode='lines',
+                name=region,
+                legendgroup=region,
+                showlegend=k == 0,
+                line=dict(width=1)
+            ), row=k // n_cols + 1, col=k % n_cols + 1)
+
+    if window is not None:
+        fig.update_xaxes(range=list(window))
+    fig.update_layout(
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        height=COMPARE_PANEL_HEIGHT * n_rows,
+        margin=dict(l=40, r=20, t=40, b=20),
+        hovermode='closest',
+        uirevision=True
+    )
+    return fig
+
+
+# Measure the comparison graph's pixel width in the browser
+dash.clientside_callback(
+    """
+    function(figure) {
+        var graph = document.getElementById('compare-graph');
+        return graph && graph.offsetWidth ? graph.offsetWidth : window.dash_clientside.no_update;
+    }
+    """,
+    Output('compare-width', 'data'),
+    Input('compare-graph', 'figure')
+)
+
+
+@callback(
+    [Output('compare-regions', 'options'),
+     Output('compare-regions', 'value')],
+    Input('compare-variables', 'value'),
+    State('compare-regions', 'value')
+)
+def update_comparison_regions(variables, selected):
+    """List the regions that have data for any selected variable."""
+    source = current_snapshot().history
+    if source is None or not variables:
+        return [], []
+
+    regions = sorted(set().union(*(source.regions(v) for v in variables)))
+    selected = [r for r in (selected or []) if r in regions] or regions[:COMPARE_DEFAULT_REGIONS]
+    return [{"label": r, "value": r} for r in regions], selected
+
+
+@callback(
+    [Output('compare-graph', 'figure'),
+     Output('compare-window', 'data')],
+    [Input('compare-variables', 'value'),
+     Input('compare-regions', 'value'),
+     Input('compare-graph', 'relayoutData')],
+    [State('compare-width', 'data'),
+     State('compare-window', 'data')]
+)
+def update_comparison(variables, regions, relayout_data, width, window):
+    """Redraw the comparison panels, re-fetching detail for zoomed windows.
+
+    The zoom window is kept in the compare-window store, so changing the
+    variables or regions redraws the range the user is looking at.
+    """
+    if dash.callback_context.triggered_id == 'compare-graph':
+        zoom = parse_zoom_window(relayout_data)
+        if zoom is dash.no_update:
+            return dash.no_update, dash.no_update
+        window = zoom
+    window = tuple(window) if window else None
+
+    if not variables or not regions:
+        return go.Figure(), window
+
+    # All panels come from the snapshot this request started on
+    return create_comparison_figure(current_snapshot().history, variables, regions,
+                                    width or COMPARE_DEFAULT_WIDTH, window), window
+
 # --- Custom CSS ---
 app.index_string = '''
         <!DOCTYPE html>
@@ -757,5 +1282,33 @@ app.index_string = '''
 # --- Server Configuration ---
 server = app.server
 
+# Dash merges `@callback` registrations into the app on the first request and
+# flags that as done before it finishes, so concurrent first requests on a
+# threaded worker can miss callbacks. Run it once at import instead; with
+# preload_app this happens in the gunicorn master, before any worker forks.
+app._setup_server()
+
+
+# Switch to a newly published data snapshot between requests; each request
+# keeps the snapshot it started with until it finishes
+@server.before_request
+def pin_snapshot():
+    g.snapshot = snapshots.refresh()
+
+
+@server.after_request
+def add_snapshot_header(response):
+    response.headers['X-Data-Version'] = current_snapshot().version
+    return response
+
+
+# Request profiling is only wired in when an admin token is configured
+if os.environ.get('PROFILE_TOKEN'):
+    install_profiler(
+        server,
+        token=os.environ['PROFILE_TOKEN'],
+        directory=os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+    )
+
 if __name__ == '__main__':
     app.run_server(debug=True)
@@ -0,0 +1,304 @@
+"""
+Callback Benchmarks
+-------------------
+Micro-benchmarks for the building blocks of the app, with stored baselines
+and regression budgets. Run from the app directory:
+
+    python bench_callbacks.py                    # compare against the baseline
+    python bench_callbacks.py --update-baseline  # record a new baseline
+
+Each benchmark runs on the real catalog (1x) and on synthetic catalogs scaled
+10x, 100x and 1000x (pillar subjects and catalog rows repeated). The median of
+several runs is compared with bench_baseline.json, and the run fails (exit
+code 1) when any median exceeds its budget or has no baseline.
+
+A budget is the baseline scaled by the machine's current speed, plus the
+larger of the relative tolerance and an absolute floor. The speed comes
+from a fixed calibration workload timed in turn with every benchmark, now
+and when the baseline was recorded, so budgets stretch on slower machines
+and busy CI hosts; the floor keeps sub-millisecond benchmarks from failing
+on timer noise.
+Results are written as JSON to --output.
+
+The same benchmarks run as parametrised pytest cases in
+tests/test_benchmarks.py, selected with `python -m pytest -m benchmark`.
+"""
+
+# --- Imports ---
+import argparse
+import contextvars
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import plotly
+from dash._utils import AttributeDict
+
+import app
+from bench_serving import _id_str
+from network import build_influence_graph
+from simulation import transfer_matrix
+from snapshots import Snapshot
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(APP_DIR, "bench_baseline.json")
+SCALES = (1, 10, 100, 1000)
+DEFAULT_TOLERANCE = 0.5  # Fail when more than 50% slower than baseline...
+DEFAULT_FLOOR = 0.002  # ...and more than 2 ms slower
+
+# Unscaled data, captured before use_scale rebinds the app's globals
+BASE_PILLARS = app.pillars_data
+BASE_CATALOG_FILES = app.snapshots.current.catalog_files
+
+
+# --- Scaled Data ---
+def scaled_pillars(scale):
+    """Repeat every pillar's subjects `scale` times under distinct titles."""
+    if scale == 1:
+        return BASE_PILLARS
+    return app.freeze({
+        pillar_id: {
+            **pillar,
+            "subjects": [
+                {**subject, "title": f"{subject['title']} {k}"}
+                for k in range(scale) for subject in pillar["subjects"]
+            ]
+        }
+        for pillar_id, pillar in BASE_PILLARS.items()
+    })
+
+
+def scaled_catalogs(scale, directory):
+    """Write catalog files with every section repeated `scale` times."""
+    if scale == 1:
+        return BASE_CATALOG_FILES
+    paths = {}
+    for table, path in BASE_CATALOG_FILES.items():
+        with open(path) as f:
+            header, *rows = f.read().splitlines()
+        paths[table] = os.path.join(directory, f"{table}-{scale}x.csv")
+        with open(paths[table], "w") as f:
+            f.write("\n".join([header] + rows * scale) + "\n")
+    return paths
+
+
+def use_scale(scale, directory):
+    """Point the app's module-level data at a scaled copy."""
+    pillars = scaled_pillars(scale)
+    app.pillars_data = pillars
+    app.influence_graph = build_influence_graph(pillars, app.create_connection_info())
+    app.shock_matrix = transfer_matrix(app.influence_graph, damping=app.SHOCK_DAMPING)
+    app.snapshots.install(Snapshot(f"{scale}x", scaled_catalogs(scale, directory)))
+
+
+# --- Benchmarks ---
+def to_json(value):
+    return json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def in_callback_context(func, *args, triggered=None):
+    """Call a callback function with dash.callback_context populated."""
+    ctx = AttributeDict(triggered_inputs=triggered or [])
+
+    def run():
+        from dash._callback_context import context_value
+        context_value.set(ctx)
+        return func(*args)
+
+    return contextvars.copy_context().run(run)
+
+
+def bench_create_pillar_view():
+    to_json(app.create_pillar_view())
+
+
+def bench_create_connections_view():
+    to_json(app.create_connections_view())
+
+
+def bench_update_connection_details(figure):
+    to_json(app.update_connection_details({"points": [{"curveNumber": 0}]}, figure))
+
+
+def bench_update_table():
+    to_json(app.update_table("pbc"))
+
+
+def bench_toggle_collapse():
+    # Open the last subject for the first time, which renders its body
+    pillar = list(app.pillars_data)[-1]
+    index = len(app.pillars_data[pillar]["subjects"]) - 1
+    button = app.subject_id("button", pillar, index)
+    triggered = [{"prop_id": f"{_id_str(button)}.n_clicks", "value": 1}]
+    to_json(in_callback_context(app.toggle_collapse, 1, False, False, triggered=triggered))
+
+
+# Benchmark names, in run order; each runs at every scale
+BENCHMARK_NAMES = (
+    "create_pillar_view",
+    "create_connections_view",
+    "update_connection_details",
+    "update_table",
+    "toggle_collapse",
+)
+
+
+def benchmarks():
+    """(name, function) pairs, built against the currently active scale."""
+    view = app.create_connections_view()
+    graph = next(c for c in _walk(view) if getattr(c, "id", None) == "connections-graph")
+    figure = json.loads(to_json(graph.figure))
+    functions = {
+        "create_pillar_view": bench_create_pillar_view,
+        "create_connections_view": bench_create_connections_view,
+        "update_connection_details": lambda: bench_update_connection_details(figure),
+        "update_table": bench_update_table,
+        "toggle_collapse": bench_toggle_collapse,
+    }
+    return [(name, functions[name]) for name in BENCHMARK_NAMES]
+
+
+def _walk(component):
+    """Yield a Dash component and all of its descendants."""
+    yield component
+    children = getattr(component, "children", None)
+    for child in children if isinstance(children, (list, tuple)) else [children]:
+        if hasattr(child, "children") or hasattr(child, "id"):
+            yield from _walk(child)
+
+
+def calibration_workload():
+    """Fixed, allocation-free pure-Python work, timed to gauge machine speed."""
+    total = 0
+    for i in range(100_000):
+        total += i * i % 7
+    return total
+
+
+def measure(func, min_runs=3, min_seconds=0.5, max_runs=200):
+    """Median wall times of func and of the calibration workload.
+
+    The two alternate, over at least min_runs and min_seconds, so both see
+    the same machine load. As with timeit, the garbage collector is paused
+    while timing so its pauses don't land on random runs.
+    """
+    func()  # Warm up
+    times, calibration = [], []
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() - start < min_seconds):
+            for work, samples in ((func, times), (calibration_workload, calibration)):
+                t = time.perf_counter()
+                work()
+                samples.append(time.perf_counter() - t)
+    finally:
+        gc.enable()
+    return statistics.median(times), len(times), statistics.median(calibration)
+
+
+# --- Running ---
+def run(scales):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in scales:
+            use_scale(scale, directory)
+            for name, func in benchmarks():
+                median, runs, calibration = measure(func)
+                results[f"{name}[{scale}x]"] = {"median_s": median, "runs": runs, "calibration_s": calibration}
+                print(f"{name + f'[{scale}x]':<36}{median * 1000:>12.3f} ms  ({runs} runs)", flush=True)
+    return results
+
+
+def budget(base, tolerance, floor, speed=1.0):
+    """Largest acceptable median for a benchmark with baseline `base`."""
+    expected = base * speed
+    return max(expected * (1 + tolerance), expected + floor)
+
+
+def compare(results, baseline, tolerance, floor=DEFAULT_FLOOR, calibration=None):
+    """List of failure messages: results over budget or without a baseline.
+
+    Each result's calibration time over the baseline's `calibration` is how
+    much slower the machine is now, and budgets grow with it. They never
+    shrink below the baseline's own budget: noise does not get smaller on a
+    faster machine.
+    """
+    failures = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            failures.append(f"{key}: no baseline recorded (run with --update-baseline)")
+            continue
+        speed = max(result["calibration_s"] / calibration, 1.0) if calibration else 1.0
+        limit = budget(base, tolerance, floor, speed)
+        if result["median_s"] > limit:
+            failures.append(
+                f"{key}: {result['median_s'] * 1000:.3f} ms exceeds budget "
+                f"{limit * 1000:.3f} ms (baseline {base * 1000:.3f} ms, speed x{speed:.2f})"
+            )
+    return failures
+
+
+def load_baseline(path=BASELINE_FILE):
+    """The stored baseline file, or an empty one."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark app callbacks against stored baselines.")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help=f"allowed slowdown as a fraction (default: from baseline, else {DEFAULT_TOLERANCE})")
+    parser.add_argument("--floor", type=float, default=None,
+                        help=f"allowed slowdown in seconds (default: from baseline, else {DEFAULT_FLOOR})")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    stored = load_baseline(args.baseline)
+    tolerance = args.tolerance if args.tolerance is not None else stored.get("tolerance", DEFAULT_TOLERANCE)
+    floor = args.floor if args.floor is not None else stored.get("floor_s", DEFAULT_FLOOR)
+    results = run(args.scales)
+    calibration = statistics.median(r["calibration_s"] for r in results.values())
+    speed = calibration / stored["calibration_s"] if "calibration_s" in stored else 1.0
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "tolerance": tolerance,
+        "floor_s": floor,
+        "calibration_s": calibration,
+        "speed": speed,
+        "results": results,
+    }
+    if args.update_baseline:
+        # Keep other scales' baselines comparable by rescaling them to this machine
+        baseline = {key: base * speed for key, base in stored.get("baseline_s", {}).items()}
+        baseline.update({key: r["median_s"] for key, r in results.items()})
+        with open(args.baseline, "w") as f:
+            json.dump({"tolerance": tolerance, "floor_s": floor, "calibration_s": calibration,
+                       "baseline_s": baseline}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        failures = []
+    else:
+        failures = compare(results, stored.get("baseline_s", {}), tolerance, floor, stored.get("calibration_s"))
+
+    report["failures"] = failures
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for message in failures:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
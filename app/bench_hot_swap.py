@@ -0,0 +1,137 @@
+"""
+Hot Swap Check
+--------------
+Publish new data snapshots while the app is under concurrent load and check
+that no request fails or sees mixed data. Run from the app directory:
+
+    python bench_hot_swap.py [--clients 16] [--swaps 10] [--interval 1.0]
+
+A threaded gunicorn server is started on a temporary snapshot root. Client
+threads keep requesting the Data Tables callback while new versions are
+published, each with a marker in the catalog's Notes column. Every response
+must succeed and carry the marker of the version named in its X-Data-Version
+header. Reports swap propagation time (publish to first response served from
+the new version) and exits with code 1 on any failure.
+"""
+
+# --- Imports ---
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from bench_serving import APP_DIR, _callback, wait_until_up
+from snapshots import CATALOG_TABLES, publish_snapshot
+
+MARKED_NOTE = "High spatial granularity through monitoring stations"
+
+
+# --- Snapshots ---
+def write_components(directory, n):
+    """Copy the bundled catalogs, marking pbc.csv with version number n."""
+    for table in CATALOG_TABLES:
+        with open(os.path.join(APP_DIR, "components", f"{table}.csv")) as f:
+            text = f.read()
+        if table == "pbc":
+            text = text.replace(MARKED_NOTE, f"swap-marker-{n}")
+        with open(os.path.join(directory, f"{table}.csv"), "w") as f:
+            f.write(text)
+
+
+# --- Load ---
+def run(clients, swaps, interval, port, workers):
+    root = tempfile.mkdtemp(prefix="snapshots-")
+    staging = os.path.join(root, "incoming")
+    os.makedirs(staging)
+    markers, published = {}, {}
+
+    def publish(n):
+        version = f"v{n:03d}"
+        markers[version] = f"swap-marker-{n}"
+        write_components(staging, n)
+        publish_snapshot(root, staging, version=version)
+        published[version] = time.perf_counter()
+
+    publish(0)
+    env = dict(os.environ, WEB_PROFILE="threaded", WEB_WORKERS=str(workers), PORT=str(port), SNAPSHOT_ROOT=root)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:server"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    body = _callback([("data-table-container", "children")], [("table-selector", "value", "pbc")])
+    url = f"http://127.0.0.1:{port}/_dash-update-component"
+    responses, failures = [], []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def client():
+        while not stop.is_set():
+            req = urllib.request.Request(url, data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=30) as r:
+                    version, text = r.headers["X-Data-Version"], r.read().decode()
+            except OSError as e:
+                with lock:
+                    failures.append(f"request failed: {e}")
+                continue
+            end = time.perf_counter()
+            with lock:
+                responses.append((start, end, version))
+                if markers.get(version) not in text:
+                    failures.append(f"response tagged {version} does not carry its data")
+
+    try:
+        wait_until_up(f"http://127.0.0.1:{port}/")
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for t in threads:
+            t.start()
+        for n in range(1, swaps + 1):
+            time.sleep(interval)
+            publish(n)
+        time.sleep(interval)
+        stop.set()
+        for t in threads:
+            t.join()
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(root, ignore_errors=True)
+
+    # Propagation: from publishing a version to the first response served from it
+    propagation = {}
+    for version, at in published.items():
+        served = [end for start, end, v in responses if v == version and end >= at]
+        if served and version != "v000":
+            propagation[version] = min(served) - at
+    final = f"v{swaps:03d}"
+    tail = [v for start, end, v in responses if start > published[final] + 1.0]
+    if any(v != final for v in tail):
+        failures.append("requests still served from an old version one second after the last swap")
+    return responses, failures, propagation
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Publish data snapshots under concurrent load.")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--swaps", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    responses, failures, propagation = run(args.clients, args.swaps, args.interval, args.port, args.workers)
+    seconds = responses[-1][1] - responses[0][0] if responses else 0
+    print(f"{len(responses)} requests in {seconds:.1f} s across {args.swaps} swaps, {len(failures)} failures")
+    if propagation:
+        print(f"swap propagation: median {sorted(propagation.values())[len(propagation) // 2] * 1000:.0f} ms, "
+              f"max {max(propagation.values()) * 1000:.0f} ms")
+    for message in sorted(set(failures)):
+        print(f"FAIL {message}", file=sys.stderr)
+    sys.exit(1 if failures or not responses else 0)
@@ -0,0 +1,186 @@
+"""
+Serving Benchmark
+-----------------
+Compare throughput and memory of the sync and threaded gunicorn profiles
+(see gunicorn.conf.py) under the same load. Run from the app directory:
+
+    python bench_serving.py [--clients 16] [--seconds 20]
+
+Each profile is started in turn and hit by the same number of client threads
+with a mix of page loads and callback requests (Data Tables, network query,
+subject toggle). Reports requests/sec, latency percentiles and the total
+resident memory of the gunicorn master and workers.
+"""
+
+# --- Imports ---
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- Request Mix ---
+def _id_str(component_id, match=()):
+    """A component id as Dash writes it in callback keys; `match` keys become MATCH."""
+    if not isinstance(component_id, dict):
+        return component_id
+    pattern = {k: ["MATCH"] if k in match else v for k, v in component_id.items()}
+    return json.dumps(pattern, sort_keys=True, separators=(",", ":"))
+
+
+def _callback(outputs, inputs, state=(), changed=None, match=()):
+    """Build a /_dash-update-component request body.
+
+    Ids may be pattern-matching dicts; the keys named in `match` are the ones
+    the callback declares with MATCH.
+    """
+    output_ids = [{"id": i, "property": p} for i, p in outputs]
+    if len(outputs) == 1:
+        output, output_ids = f"{_id_str(outputs[0][0], match)}.{outputs[0][1]}", output_ids[0]
+    else:
+        output = ".." + "...".join(f"{_id_str(i, match)}.{p}" for i, p in outputs) + ".."
+    body = {
+        "output": output,
+        "outputs": output_ids,
+        "inputs": [{"id": i, "property": p, "value": v} for i, p, v in inputs],
+        "state": [{"id": i, "property": p, "value": v} for i, p, v in state],
+        "changedPropIds": [changed or f"{_id_str(inputs[0][0])}.{inputs[0][1]}"],
+    }
+    return json.dumps(body).encode()
+
+
+def subject_toggle(pillar, index, clicks=1, is_open=False, rendered=False):
+    """Request body for a click on one subject of the pillar view."""
+    sys.path.insert(0, APP_DIR)
+    from app import subject_id
+
+    return _callback(
+        [(subject_id("collapse", pillar, index), "is_open"),
+         (subject_id("body", pillar, index), "children"),
+         (subject_id("rendered", pillar, index), "data")],
+        [(subject_id("button", pillar, index), "n_clicks", clicks)],
+        [(subject_id("collapse", pillar, index), "is_open", is_open),
+         (subject_id("rendered", pillar, index), "data", rendered)],
+        match=("pillar", "index"),
+    )
+
+
+def request_mix():
+    """(method, path, body) tuples cycled through by every client."""
+    return [
+        ("GET", "/", None),
+        ("POST", "/_dash-update-component", _callback(
+            [("data-table-container", "children")], [("table-selector", "value", "pbc")])),
+        ("POST", "/_dash-update-component", _callback(
+            [("network-results", "children"), ("network-target-row", "style")],
+            [("network-node", "value", "ea/Labour Market/Employment Structure/Labor market slack"),
+             ("network-query", "value", "in"), ("network-hops", "value", 4),
+             ("network-kind", "value", "variable"), ("network-target", "value", None)])),
+        ("POST", "/_dash-update-component", subject_toggle("pbc", 0)),
+    ]
+
+
+# --- Measurement ---
+def rss_mb(pid):
+    """Resident memory of a process and all its children, in MiB."""
+    total = 0
+    pids = [pid] + [int(p) for p in subprocess.run(
+        ["pgrep", "-P", str(pid)], capture_output=True, text=True).stdout.split()]
+    for p in pids:
+        with open(f"/proc/{p}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1])
+    return total / 1024
+
+
+def wait_until_up(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2).read()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def run_load(base_url, mix, clients, seconds):
+    """Drive the server from `clients` threads; return per-request latencies."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def client(offset):
+        k = offset
+        while time.perf_counter() < stop_at:
+            method, path, body = mix[k % len(mix)]
+            k += 1
+            req = urllib.request.Request(base_url + path, data=body, method=method,
+                                         headers={"Content-Type": "application/json"})
+            start = time.perf_counter()
+            try:
+                urllib.request.urlopen(req, timeout=30).read()
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+            except OSError as e:
+                with lock:
+                    errors.append(e)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors
+
+
+def bench_profile(profile, mix, clients, seconds, port):
+    env = dict(os.environ, WEB_PROFILE=profile, PORT=str(port))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:server"],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        wait_until_up(base_url + "/")
+        # Warm-up latencies are dropped, but its errors count: first requests
+        # to a fresh worker are exactly where start-up races show up
+        _, warmup_errors = run_load(base_url, mix, clients, 2)
+        latencies, errors = run_load(base_url, mix, clients, seconds)
+        errors += warmup_errors
+        memory = rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    pct = lambda q: latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else float("nan")
+    return {
+        "profile": profile,
+        "requests_per_sec": len(latencies) / seconds,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "errors": len(errors),
+        "rss_mb": memory,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare sync and threaded gunicorn profiles.")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    mix = request_mix()
+    print(f"{'profile':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}{'RSS MiB':>10}")
+    for profile in ("sync", "threaded"):
+        r = bench_profile(profile, mix, args.clients, args.seconds, args.port)
+        print(f"{r['profile']:<10}{r['requests_per_sec']:>10.1f}{r['p50_ms']:>10.1f}"
+              f"{r['p95_ms']:>10.1f}{r['errors']:>8}{r['rss_mb']:>10.1f}")
@@ -0,0 +1,187 @@
+"""
+Catalog Loading
+---------------
+Schema-validated loading of the data availability catalogs (pbc.csv, hsc.csv,
+ea.csv) used by the Data Tables view.
+
+The catalog files are written for humans: a section heading sits alone on its
+own row, and the Subject/Component cells are only filled in when they change.
+`load_catalog` turns that layout into a flat, typed frame:
+
+- the section heading becomes a "Section" column on every variable row
+- Subject and Component are forward-filled within their parent
+- low-cardinality columns are stored as categoricals instead of Python strings
+
+Any rows that do not fit the schema are collected and raised together in a
+single CatalogValidationError, so a broken file reports every problem at once.
+"""
+
+# --- Imports ---
+import re
+
+import pandas as pd
+
+# --- Schema ---
+# Columns exactly as they appear in the catalog CSV header
+CATALOG_COLUMNS = [
+    "Subject",
+    "Component",
+    "Variables",
+    "Optimal NUTS Level",
+    "Data Source",
+    "Notes",
+]
+
+# Hierarchy columns, outermost first. "Section" is derived from heading rows.
+HIERARCHY_COLUMNS = ["Section", "Subject", "Component"]
+
+# Columns that repeat a small set of values and are stored as categoricals
+CATEGORICAL_COLUMNS = HIERARCHY_COLUMNS + ["Optimal NUTS Level", "Data Source"]
+
+# Columns every variable row must fill in
+REQUIRED_COLUMNS = ["Variables", "Optimal NUTS Level", "Data Source"]
+
+# "NUTS 2", "NUTS 2/3", "NUTS 1/2", ...
+NUTS_LEVEL_PATTERN = re.compile(r"^NUTS [0-3](/[0-3])*$")
+
+
+class CatalogValidationError(ValueError):
+    """Raised when a catalog file does not match the schema.
+
+    `errors` holds one (line, column, message) tuple per problem, where `line`
+    is the 1-based line number in the CSV file (the header is line 1).
+    """
+
+    def __init__(self, source, errors):
+        self.source = source
+        self.errors = errors
+        lines = [f"{source}: {len(errors)} invalid row(s)"]
+        lines += [f"  line {line}, {column}: {message}" for line, column, message in errors]
+        super().__init__("\n".join(lines))
+
+
+# --- Helper Functions ---
+def _read_raw(path_or_buffer):
+    """Read a catalog CSV with every cell as a stripped string or NA."""
+    df = pd.read_csv(path_or_buffer, dtype=str, keep_default_na=False)
+    df = df.apply(lambda col: col.str.strip())
+    return df.replace("", pd.NA)
+
+
+def _validate(df, source):
+    """Check the raw catalog rows and return a list of row-level errors."""
+    errors = []
+
+    if list(df.columns) != CATALOG_COLUMNS:
+        errors.append((1, "header", f"expected columns {CATALOG_COLUMNS}, got {list(df.columns)}"))
+        return errors
+
+    # Heading rows carry only a Subject; everything else is a variable row
+    filled = df.notna()
+    is_heading = filled["Subject"] & ~filled.drop(columns="Subject").any(axis=1)
+    seen_heading = is_heading.cummax()
+
+    is_variable = ~is_heading
+    for row in df.index[is_variable & ~seen_heading]:
+        errors.append((row + 2, "Subject", "variable row appears before the first section heading"))
+    for column in REQUIRED_COLUMNS:
+        for row in df.index[is_variable & ~filled[column]]:
+            errors.append((row + 2, column, "missing value"))
+    levels = df["Optimal NUTS Level"]
+    bad_level = is_variable & filled["Optimal NUTS Level"] & ~levels.str.match(NUTS_LEVEL_PATTERN, na=False)
+    for row in df.index[bad_level]:
+        errors.append((row + 2, "Optimal NUTS Level", f"invalid NUTS level {levels[row]!r}"))
+
+    # The first variable row of a section must name its Subject, and every row
+    # that starts a Subject group must name its Component
+    section_start = is_heading.shift(fill_value=True) & is_variable
+    for row in df.index[section_start & ~filled["Subject"]]:
+        errors.append((row + 2, "Subject", "first row of a section must fill in this column"))
+    subject_start = section_start | (is_variable & filled["Subject"])
+    for row in df.index[subject_start & ~filled["Component"]]:
+        errors.append((row + 2, "Component", "first row of a subject must fill in this column"))
+
+    return sorted(errors)
+
+
+# --- Loading ---
+def load_catalog(path_or_buffer, source=None):
+    """Load, validate and normalise a catalog CSV.
+
+    Returns a DataFrame with one row per variable and the columns
+    HIERARCHY_COLUMNS followed by the remaining CATALOG_COLUMNS.
+    Raises CatalogValidationError if any row fails validation.
+    """
+    source = source or str(path_or_buffer)
+    df = _read_raw(path_or_buffer)
+
+    errors = _validate(df, source)
+    if errors:
+        raise CatalogValidationError(source, errors)
+
+    filled = df.notna()
+    is_heading = filled["Subject"] & ~filled.drop(columns="Subject").any(axis=1)
+
+    # Spread the heading down its section, then drop the heading rows
+    df.insert(0, "Section", df["Subject"].where(is_heading).ffill())
+    df.loc[is_heading, "Subject"] = pd.NA
+    df = df[~is_heading]
+
+    # Forward-fill Subject within each section, Component within each Subject
+    df["Subject"] = df.groupby("Section", sort=False)["Subject"].ffill()
+    df["Component"] = df.groupby(["Section", "Subject"], sort=False)["Component"].ffill()
+
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype("category")
+
+    return df.reset_index(drop=True)
+
+
+# --- Memory Report ---
+def make_synthetic_catalog(n_rows, seed=0):
+    """Build an in-memory raw catalog CSV with `n_rows` variable rows."""
+    import io
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    levels = ["NUTS 2", "NUTS 3", "NUTS 2/3", "NUTS 1/2"]
+    sources = [
+        "Eurostat Regional Database", "Eurostat Regional Statistics", "EU-SILC",
+        "EU-LFS", "DESI", "European Environmental Agency (EEA)", "DG REGIO",
+    ]
+
+    buffer = io.StringIO()
+    buffer.write(",".join(f'"{c}"' for c in CATALOG_COLUMNS) + "\n")
+    level_idx = rng.integers(len(levels), size=n_rows)
+    source_idx = rng.integers(len(sources), size=n_rows)
+    note_idx = rng.integers(20, size=n_rows)
+    rows_per_section, rows_per_subject, rows_per_component = 1000, 50, 5
+    for row in range(n_rows):
+        if row % rows_per_section == 0:
+            buffer.write(f"Section {row // rows_per_section},,,,,\n")
+        subject = f"Subject {row // rows_per_subject}" if row % rows_per_subject == 0 else ""
+        component = f"Component {row // rows_per_component}" if row % rows_per_component == 0 else ""
+        buffer.write(
+            f"{subject},{component},Variable {row},{levels[level_idx[row]]},"
+            f"{sources[source_idx[row]]},Coverage note {note_idx[row]}\n"
+        )
+    buffer.seek(0)
+    return buffer
+
+
+if __name__ == '__main__':
+    # Compare the memory footprint of a plain read_csv with load_catalog
+    import sys
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    buffer = make_synthetic_catalog(n_rows)
+
+    before = pd.read_csv(buffer)
+    buffer.seek(0)
+    after = load_catalog(buffer, source="synthetic")
+
+    before_mb = before.memory_usage(deep=True).sum() / 2 ** 20
+    after_mb = after.memory_usage(deep=True).sum() / 2 ** 20
+    print(f"synthetic catalog: {len(after):,} variable rows")
+    print(f"read_csv (object columns): {before_mb:8.1f} MiB")
+    print(f"load_catalog (categorical): {after_mb:8.1f} MiB")
@@ -0,0 +1,50 @@
+"""
+Gunicorn Configuration
+----------------------
+Serving profiles for the dashboard. Run from the app directory:
+
+    gunicorn -c gunicorn.conf.py app:server
+
+Two profiles are supported, picked with the WEB_PROFILE environment variable:
+
+- "threaded" (default): gthread workers, one per CPU, each with WEB_THREADS
+  request threads (default 4). Callbacks spend much of their time building
+  Plotly figures and serialising JSON, so threads share one copy of the
+  module-level data (pillar data, influence graph, caches) instead of
+  duplicating it per process.
+- "sync": classic pre-fork sync workers, 2 * CPUs + 1 processes, one request
+  at a time each.
+
+This is safe because app.py builds its module-level state once at import and
+freezes it (read-only mappings, tuples and non-writeable numpy arrays). The
+only mutable shared state is the active data snapshot, replaced by a single
+reference swap between requests (snapshots.py), and the decimated-series
+cache, keyed by history source (timeseries.py). Callbacks must not write to
+module globals. Dash's own lazy first-request setup is run at import in app.py,
+so it is done once in the master rather than raced by a worker's first threads.
+
+WEB_WORKERS and WEB_THREADS override the computed counts; PORT sets the port.
+"""
+
+import multiprocessing
+import os
+
+cpus = multiprocessing.cpu_count()
+profile = os.environ.get("WEB_PROFILE", "threaded")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8050')}"
+
+if profile == "threaded":
+    worker_class = "gthread"
+    workers = int(os.environ.get("WEB_WORKERS", cpus))
+    threads = int(os.environ.get("WEB_THREADS", 4))
+elif profile == "sync":
+    worker_class = "sync"
+    workers = int(os.environ.get("WEB_WORKERS", 2 * cpus + 1))
+    threads = 1
+else:
+    raise ValueError(f"Unknown WEB_PROFILE {profile!r}; expected 'threaded' or 'sync'")
+
+# Import the app once in the master so workers share its pages copy-on-write
+preload_app = True
+timeout = 60
@@ -0,0 +1,415 @@
+"""
+Bulk Ingestion
+--------------
+Streaming ingestion of bulk regional statistics files into a compact columnar
+history store.
+
+Two input layouts are understood, plain or compressed (.gz, .zip, ...):
+
+- Eurostat wide TSV: the first column holds comma-separated dimension codes
+  ending in the region ("unit,na_item,geo\\time"), the other columns hold one
+  period each, and cells look like "447218.5 p" or ": " (value, then flags)
+- SDMX-CSV long: one observation per row with geo, TIME_PERIOD, OBS_VALUE
+  and optionally OBS_FLAG columns
+
+Input is read in fixed-size chunks, so memory stays bounded by the chunk size
+and the number of distinct regions, not by the size of the file. Series are
+mapped onto catalog variables with a list of mappings such as
+
+    [{"variable": "Real GDP", "match": {"unit": "CLV10_MEUR", "na_item": "B1GQ"}}]
+
+and every kept observation is appended to one binary file per column:
+
+    variable.i2  region.i4  time.i4 (days since 1970-01-01)  value.f8  flag.u1
+
+A manifest.json next to them records the row count, the code tables and the
+rows per variable, and is replaced atomically once a run completes. `HistoryStore` reads the columns
+back through memory maps and serves them to the comparison view.
+
+Column files are only ever appended to, never rewritten, because a running
+app may have them memory-mapped (truncating a mapped file crashes its
+readers). A store that already has a manifest is therefore only extended with
+--append; to replace one, ingest into a new directory and publish it as a
+snapshot (see snapshots.py).
+
+Usage, from the app directory:
+
+    python ingest.py STORE_DIR MAPPING.json FILE [FILE ...]
+"""
+
+# --- Imports ---
+import datetime
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from catalog import load_catalog
+
+COLUMNS = {
+    "variable": np.int16,
+    "region": np.int32,
+    "time": np.int32,
+    "value": np.float64,
+    "flag": np.uint8,
+}
+MANIFEST = "manifest.json"
+DEFAULT_CHUNK_ROWS = 20_000
+LONG_COLUMNS = ("geo", "TIME_PERIOD", "OBS_VALUE")
+
+
+class IngestError(ValueError):
+    """Raised when an input file or mapping cannot be ingested."""
+
+
+# --- Helper Functions ---
+def parse_period(label):
+    """First day of a Eurostat period label as datetime64[D].
+
+    Handles years ("2021"), quarters ("2021Q3"), months ("2021M07" or
+    "2021-07"), semesters ("2021S2"), ISO weeks ("2021W05", starting on
+    Monday) and full dates ("2021-07-15"). Raises IngestError for anything
+    else.
+    """
+    label = label.strip()
+    try:
+        year = int(label[:4])
+        rest = label[4:].lstrip("-")
+        if not rest:
+            return np.datetime64(f"{year}-01-01", "D")
+        if rest[0] == "W":
+            return np.datetime64(datetime.date.fromisocalendar(year, int(rest[1:]), 1), "D")
+        if rest[0] in "QSM":
+            months_per_period = {"Q": 3, "S": 6, "M": 1}[rest[0]]
+            month = (int(rest[1:]) - 1) * months_per_period + 1
+        elif len(rest) == 2:
+            month = int(rest)
+        else:
+            return np.datetime64(f"{year}-{rest}", "D")
+        return np.datetime64(f"{year}-{month:02d}-01", "D")
+    except ValueError:
+        raise IngestError(f"unrecognised period label {label!r}") from None
+
+
+def _intern(values, table):
+    """Map strings to integer codes, adding unseen strings to `table`."""
+    values = np.asarray(values, dtype=object)
+    for value in pd.unique(values):
+        if value not in table:
+            table[value] = len(table)
+    return pd.Series(values).map(table).to_numpy()
+
+
+def catalog_variables(catalog_files):
+    """Every variable name listed in the catalog files."""
+    names = set()
+    for path in catalog_files:
+        names.update(load_catalog(path)["Variables"])
+    return names
+
+
+def validate_mappings(mappings, known_variables=None):
+    """Check mapping entries and, if given, their variables against the catalog."""
+    for k, mapping in enumerate(mappings):
+        if not isinstance(mapping.get("variable"), str) or not isinstance(mapping.get("match", {}), dict):
+            raise IngestError(f"mapping {k}: expected {{'variable': str, 'match': {{dimension: code}}}}")
+        if known_variables is not None and mapping["variable"] not in known_variables:
+            raise IngestError(f"mapping {k}: {mapping['variable']!r} is not a catalog variable")
+
+
+# --- Chunk Parsing ---
+def _match(dims, mappings):
+    """Index of the first mapping each row satisfies, or -1."""
+    matched = np.full(len(dims), -1)
+    for k, mapping in enumerate(mappings):
+        mask = matched < 0
+        for dim, code in mapping.get("match", {}).items():
+            if dim not in dims:
+                mask[:] = False
+                break
+            mask &= (dims[dim] == code).to_numpy()
+        matched[mask] = k
+    return matched
+
+
+def _split_cells(cells):
+    """Split "447218.5 p" style cells into float values and flag strings.
+
+    Uses numpy's vectorised string functions; ":" (not available) becomes NaN.
+    """
+    number, _, flags = np.strings.partition(np.strings.strip(cells), " ")
+    number = np.where(np.strings.startswith(number, ":") | (number == ""), "nan", number)
+    try:
+        values = number.astype(float)
+    except ValueError:
+        # Malformed cells: fall back to the slower, forgiving parser
+        values = pd.to_numeric(pd.Series(number), errors="coerce").to_numpy()
+    return values, np.strings.strip(flags)
+
+
+def _parse_wide(chunk, dim_names, periods, mappings):
+    """Turn a wide TSV chunk into (mapping index, geo, time, value, flag) arrays."""
+    dims = chunk.iloc[:, 0].str.split(",", expand=True)
+    dims.columns = dim_names
+    matched = _match(dims, mappings)
+    keep = matched >= 0
+    if not keep.any():
+        return None
+
+    cells = chunk.iloc[:, 1:].fillna(":").to_numpy(dtype=str)[keep]
+    n_rows, n_periods = cells.shape
+    values, flags = _split_cells(cells.ravel())
+    return (
+        np.repeat(matched[keep], n_periods),
+        np.repeat(dims["geo"].to_numpy()[keep], n_periods),
+        np.tile(periods, n_rows),
+        values,
+        flags,
+    )
+
+
+def _parse_long(chunk, mappings, period_cache):
+    """Turn an SDMX-CSV chunk into (mapping index, geo, time, value, flag) arrays."""
+    matched = _match(chunk, mappings)
+    keep = matched >= 0
+    if not keep.any():
+        return None
+
+    chunk = chunk[keep]
+    labels = chunk["TIME_PERIOD"]
+    for label in pd.unique(labels):
+        if label not in period_cache:
+            period_cache[label] = parse_period(label)
+    flags = chunk["OBS_FLAG"].fillna("") if "OBS_FLAG" in chunk else pd.Series("", index=chunk.index)
+    return (
+        matched[keep],
+        chunk["geo"].to_numpy(),
+        labels.map(period_cache).to_numpy(dtype="datetime64[D]"),
+        pd.to_numeric(chunk["OBS_VALUE"], errors="coerce").to_numpy(),
+        flags.to_numpy(),
+    )
+
+
+# --- Ingestion ---
+def ingest(paths, mappings, store_dir, chunk_rows=DEFAULT_CHUNK_ROWS, append=False, known_variables=None):
+    """Stream bulk files into the history store at `store_dir`.
+
+    Returns a dict with input rows read, observations in the store, elapsed
+    seconds and rows per second. Missing observations (":") are skipped.
+    An existing store is only extended with append=True; it is never
+    rewritten in place.
+    """
+    validate_mappings(mappings, known_variables)
+    os.makedirs(store_dir, exist_ok=True)
+
+    manifest = _read_manifest(store_dir)
+    if manifest is not None and not append:
+        raise IngestError(f"{store_dir} already holds a history store; "
+                          f"append to it or ingest into a new directory")
+    tables = {
+        name: {value: code for code, value in enumerate(manifest[name] if manifest else [])}
+        for name in ("variables", "regions", "flags")
+    }
+    rows = manifest["rows"] if manifest else 0
+    mapping_codes = [_intern([m["variable"]], tables["variables"])[0] for m in mappings]
+    variable_rows = np.zeros(len(tables["variables"]), dtype=np.int64)
+    if manifest:
+        variable_rows[:len(manifest["variables"])] = _variable_rows(store_dir, manifest)
+
+    files = {
+        name: open(_column_path(store_dir, name), "ab" if append else "wb")
+        for name in COLUMNS
+    }
+    rows_read = 0
+    start = time.perf_counter()
+    try:
+        # Drop anything past the manifest's row count left by an interrupted
+        # run; rows readers can have mapped are never touched
+        for name, f in files.items():
+            f.truncate(rows * np.dtype(COLUMNS[name]).itemsize)
+
+        for path in paths:
+            for parsed, n_rows in _read_chunks(path, mappings, chunk_rows):
+                rows_read += n_rows
+                if parsed is None:
+                    continue
+                matched, geo, when, values, flags = parsed
+                present = ~np.isnan(values)
+                if not present.any():
+                    continue
+                columns = {
+                    "variable": np.asarray(mapping_codes)[matched[present]],
+                    "region": _intern(geo[present], tables["regions"]),
+                    "time": when[present].astype("datetime64[D]").astype(np.int64),
+                    "value": values[present],
+                    "flag": _intern(flags[present], tables["flags"]),
+                }
+                for name, dtype in COLUMNS.items():
+                    files[name].write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+                rows += int(present.sum())
+                variable_rows += np.bincount(columns["variable"], minlength=len(variable_rows))
+    finally:
+        for f in files.values():
+            f.close()
+
+    elapsed = time.perf_counter() - start
+    _write_manifest(store_dir, {
+        "rows": rows,
+        "variables": list(tables["variables"]),
+        "variable_rows": variable_rows.tolist(),
+        "regions": list(tables["regions"]),
+        "flags": list(tables["flags"]),
+    })
+    return {
+        "rows_read": rows_read,
+        "observations": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows_read / elapsed if elapsed else float("inf"),
+    }
+
+
+def _read_chunks(path, mappings, chunk_rows):
+    """Yield (parsed arrays or None, input rows) for each chunk of a file."""
+    header = pd.read_csv(path, sep="\t", nrows=0)
+    first = str(header.columns[0])
+
+    if "\\" in first:
+        # Eurostat wide TSV: "dim1,dim2,geo\time" followed by one column per period
+        dim_names = first.split("\\")[0].split(",")
+        if dim_names[-1] != "geo":
+            raise IngestError(f"{path}: expected the last dimension to be 'geo', got {dim_names[-1]!r}")
+        periods = np.array([parse_period(str(c)) for c in header.columns[1:]], dtype="datetime64[D]")
+        reader = pd.read_csv(path, sep="\t", dtype=str, keep_default_na=False, chunksize=chunk_rows)
+        for chunk in reader:
+            yield _parse_wide(chunk, dim_names, periods, mappings), len(chunk)
+    elif all(c in pd.read_csv(path, nrows=0).columns for c in LONG_COLUMNS):
+        period_cache = {}
+        reader = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""], chunksize=chunk_rows)
+        for chunk in reader:
+            yield _parse_long(chunk, mappings, period_cache), len(chunk)
+    else:
+        raise IngestError(f"{path}: not a Eurostat wide TSV or SDMX-CSV file")
+
+
+def _column_path(store_dir, name):
+    """Path of a column file, e.g. "value.f8"."""
+    return os.path.join(store_dir, f"{name}.{np.dtype(COLUMNS[name]).str[1:]}")
+
+
+def _read_manifest(store_dir):
+    path = os.path.join(store_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _variable_rows(store_dir, manifest):
+    """Row count per variable code.
+
+    Read from the manifest, or counted once from the variable column for
+    stores written before the manifest recorded it.
+    """
+    if "variable_rows" in manifest:
+        return np.asarray(manifest["variable_rows"], dtype=np.int64)
+    codes = np.fromfile(_column_path(store_dir, "variable"), dtype=COLUMNS["variable"], count=manifest["rows"])
+    return np.bincount(codes, minlength=len(manifest["variables"]))
+
+
+def _write_manifest(store_dir, manifest):
+    """Write the manifest atomically so readers never see a partial one."""
+    tmp = os.path.join(store_dir, f".{MANIFEST}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(store_dir, MANIFEST))
+
+
+# --- Reading ---
+class HistoryStore:
+    """Read-only view of a history store, usable as a timeseries history source."""
+
+    def __init__(self, store_dir):
+        manifest = _read_manifest(store_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No {MANIFEST} in {store_dir}")
+        self.rows = manifest["rows"]
+        self.variable_names = manifest["variables"]
+        self.region_names = manifest["regions"]
+        self.flag_names = manifest["flags"]
+        self._variable_codes = {name: code for code, name in enumerate(self.variable_names)}
+        counts = _variable_rows(store_dir, manifest) if self.rows else []
+        self._present = [self.variable_names[code] for code, n in enumerate(counts) if n]
+        self.columns = {
+            name: np.memmap(_column_path(store_dir, name), dtype=dtype, mode="r", shape=(self.rows,))
+            if self.rows else np.empty(0, dtype=dtype)
+            for name, dtype in COLUMNS.items()
+        }
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def _rows_for(self, variable):
+        """Row numbers of a variable, sorted by region then time (cached).
+
+        An unknown variable has no rows and no regions.
+        """
+        code = self._variable_codes.get(variable)
+        if code is None:
+            return np.empty(0, dtype=np.int64), {}
+        with self._lock:
+            if code not in self._index:
+                rows = np.flatnonzero(self.columns["variable"] == code)
+                order = np.lexsort((self.columns["time"][rows], self.columns["region"][rows]))
+                rows = rows[order]
+                regions = self.columns["region"][rows]
+                bounds = np.flatnonzero(np.diff(regions, prepend=-1, append=-1))
+                self._index[code] = rows, {
+                    int(regions[a]): (a, b) for a, b in zip(bounds[:-1], bounds[1:])
+                }
+            return self._index[code]
+
+    def variables(self):
+        """Variables with at least one observation, in the order first ingested."""
+        return list(self._present)
+
+    def regions(self, variable):
+        _, spans = self._rows_for(variable)
+        return sorted(self.region_names[code] for code in spans)
+
+    def series(self, variable, regions):
+        rows, spans = self._rows_for(variable)
+        region_codes = {name: code for code, name in enumerate(self.region_names)}
+        result = {}
+        for region in regions:
+            span = spans.get(region_codes.get(region))
+            if span is None:
+                continue
+            picked = rows[span[0]:span[1]]
+            result[region] = (
+                self.columns["time"][picked].astype("datetime64[D]"),
+                np.asarray(self.columns["value"][picked]),
+            )
+        return result
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream bulk statistics files into a history store.")
+    parser.add_argument("store_dir")
+    parser.add_argument("mapping", help="JSON list of {variable, match} mappings")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--append", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.mapping) as f:
+        mappings = json.load(f)
+    components = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components")
+    known = catalog_variables(os.path.join(components, f"{t}.csv") for t in ("pbc", "hsc", "ea"))
+
+    stats = ingest(args.files, mappings, args.store_dir, args.chunk_rows, args.append, known)
+    print(f"{stats['rows_read']:,} rows -> {stats['observations']:,} observations "
+          f"in {stats['seconds']:.1f} s ({stats['rows_per_sec']:,.0f} rows/sec)")
@@ -0,0 +1,187 @@
+"""
+Influence Network
+-----------------
+Graph store for the pillar/subject/component/variable influence network.
+
+Nodes are interned to integer ids and edges are held in compressed sparse row
+(CSR) form, with a second CSR for the reversed edges, so "what does X affect"
+and "what affects X" are both a slice lookup.
+
+Edges follow the direction of influence:
+
+- up the hierarchy: variable -> component -> subject -> pillar
+- across pillars: pillar -> pillar for every entry in create_connection_info()
+
+So "what influences X" is X's own subtree plus, through the pillar links,
+the pillars feeding into it, and "what X influences" climbs from X to its
+pillar and on to the pillars that one affects.
+"""
+
+# --- Imports ---
+from types import MappingProxyType
+
+import numpy as np
+
+NODE_KINDS = ("pillar", "subject", "component", "variable")
+
+
+class InfluenceGraph:
+    """Directed, weighted influence graph with interned node ids.
+
+    Node keys are "/"-joined paths such as "ea/Labour Market/Employment
+    Structure/Labor market slack", which keeps variables that share a label
+    (e.g. "Career progression") apart. Use `find` to look nodes up by label.
+    """
+
+    def __init__(self, keys, labels, kinds, sources, targets, weights=None):
+        self.keys = tuple(keys)
+        self.labels = tuple(labels)
+        self.kinds = np.array([NODE_KINDS.index(k) for k in kinds], dtype=np.int8)
+        self.ids = MappingProxyType({key: i for i, key in enumerate(self.keys)})
+
+        n = len(self.keys)
+        sources = np.asarray(sources, dtype=np.int32)
+        targets = np.asarray(targets, dtype=np.int32)
+        weights = np.ones(len(sources)) if weights is None else np.asarray(weights, dtype=float)
+
+        self.indptr, self.indices, self.weights = _to_csr(n, sources, targets, weights)
+        self.rev_indptr, self.rev_indices, self.rev_weights = _to_csr(n, targets, sources, weights)
+
+        # The graph is shared across request threads; keep it read-only
+        for array in (self.kinds, self.indptr, self.indices, self.weights,
+                      self.rev_indptr, self.rev_indices, self.rev_weights):
+            array.setflags(write=False)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def n_edges(self):
+        return len(self.indices)
+
+    def kind(self, node):
+        """Kind name ("pillar", "subject", ...) of a node id."""
+        return NODE_KINDS[self.kinds[node]]
+
+    def find(self, label):
+        """All node ids whose label matches, ignoring case."""
+        label = label.strip().lower()
+        return [i for i, name in enumerate(self.labels) if name.lower() == label]
+
+    def neighbors(self, node, direction="out"):
+        """Ids directly influenced by (out) or influencing (in) a node."""
+        indptr, indices = self._csr(direction)
+        return indices[indptr[node]:indptr[node + 1]]
+
+    def k_hop(self, sources, k, direction="out"):
+        """Nodes reachable from `sources` within k hops.
+
+        Returns {node id: hop distance}, excluding the sources themselves.
+        With direction="in" the search follows edges backwards, answering
+        "what influences these nodes within k hops".
+        """
+        indptr, indices = self._csr(direction)
+        dist = np.full(len(self), -1, dtype=np.int32)
+        frontier = np.unique(np.asarray(sources, dtype=np.int32))
+        dist[frontier] = 0
+
+        for hop in range(1, k + 1):
+            reached = _gather(indptr, indices, frontier)
+            frontier = np.unique(reached[dist[reached] < 0])
+            if not len(frontier):
+                break
+            dist[frontier] = hop
+
+        found = np.flatnonzero(dist > 0)
+        return dict(zip(found.tolist(), dist[found].tolist()))
+
+    def shortest_path(self, source, target, direction="out"):
+        """Fewest-hop path from source to target as a list of ids, or None."""
+        indptr, indices = self._csr(direction)
+        parent = np.full(len(self), -1, dtype=np.int32)
+        parent[source] = source
+        frontier = np.array([source], dtype=np.int32)
+
+        while len(frontier) and parent[target] < 0:
+            # Expand the whole frontier at once, keeping the first parent seen
+            counts = indptr[frontier + 1] - indptr[frontier]
+            reached = _gather(indptr, indices, frontier)
+            origins = np.repeat(frontier, counts)
+            new = parent[reached] < 0
+            reached, origins = reached[new], origins[new]
+            reached, first = np.unique(reached, return_index=True)
+            parent[reached] = origins[first]
+            frontier = reached
+
+        if parent[target] < 0:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(int(parent[path[-1]]))
+        return path[::-1]
+
+    def _csr(self, direction):
+        if direction == "out":
+            return self.indptr, self.indices
+        if direction == "in":
+            return self.rev_indptr, self.rev_indices
+        raise ValueError(f"direction must be 'out' or 'in', got {direction!r}")
+
+
+# --- Helper Functions ---
+def _to_csr(n, sources, targets, weights):
+    """Sort an edge list into CSR arrays (indptr, indices, weights)."""
+    order = np.lexsort((targets, sources))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+    return indptr, targets[order], weights[order]
+
+
+def _gather(indptr, indices, nodes):
+    """Concatenate the CSR rows of `nodes` without a Python loop."""
+    starts, stops = indptr[nodes], indptr[nodes + 1]
+    counts = stops - starts
+    if not counts.sum():
+        return np.empty(0, dtype=indices.dtype)
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return indices[offsets + np.arange(counts.sum())]
+
+
+# --- Building ---
+def build_influence_graph(pillars_data, connections):
+    """Build the influence graph from pillar data and pillar connections."""
+    keys, labels, kinds = [], [], []
+    sources, targets = [], []
+
+    def add_node(key, label, kind):
+        keys.append(key)
+        labels.append(label)
+        kinds.append(kind)
+        return len(keys) - 1
+
+    def add_link(parent, child):
+        # A part influences the whole it belongs to
+        sources.append(child)
+        targets.append(parent)
+
+    pillar_ids = {}
+    for pillar_id, pillar in pillars_data.items():
+        p = pillar_ids[pillar_id] = add_node(pillar_id, pillar["title"], "pillar")
+        for subject in pillar["subjects"]:
+            s_key = f"{pillar_id}/{subject['title']}"
+            s = add_node(s_key, subject["title"], "subject")
+            add_link(p, s)
+            for comp in subject["components"]:
+                c_key = f"{s_key}/{comp['title']}"
+                c = add_node(c_key, comp["title"], "component")
+                add_link(s, c)
+                for variable in comp["variables"]:
+                    v = add_node(f"{c_key}/{variable}", variable, "variable")
+                    add_link(c, v)
+
+    for key in connections:
+        from_pillar, to_pillar = key.split("-")
+        sources.append(pillar_ids[from_pillar])
+        targets.append(pillar_ids[to_pillar])
+
+    return InfluenceGraph(keys, labels, kinds, sources, targets)
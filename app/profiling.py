@@ -0,0 +1,197 @@
+"""
+Request Profiling
+-----------------
+Opt-in, per-request sampling profiler for the Flask server behind the app.
+
+When installed, a request is profiled if it carries the admin token in an
+`X-Profile` header. The token is never accepted from a URL, where it would
+end up in access logs and browser history. A background thread samples the
+request thread's stack while it runs, and the result is written as a
+collapsed-stack file (one "frame;frame;frame count" line per stack), which
+flamegraph.pl and https://www.speedscope.app open directly.
+
+Recent profiles are listed at /admin/profiles, which requires the token in
+the `X-Profile` header. Its download links are signed per file and expire
+after a few minutes, so the token itself never appears in a URL. Only the
+`keep` newest profiles are kept on disk.
+
+Nothing is installed unless `install_profiler` is called, so a server without
+a token pays no per-request cost at all.
+"""
+
+# --- Imports ---
+import hashlib
+import hmac
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import quote
+
+from flask import abort, request, send_from_directory
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_SUFFIX = ".collapsed"
+LINK_TTL = 300  # Seconds a signed download link stays valid
+
+
+# --- Sampling ---
+class StackSampler:
+    """Sample one thread's Python stack at a fixed interval."""
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """The samples in collapsed-stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    path = code.co_filename.replace("\\", "/").split("/")
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+# --- Middleware ---
+class ProfilingMiddleware:
+    """WSGI middleware that profiles requests carrying the admin token."""
+
+    def __init__(self, wsgi_app, token, directory, interval=0.001, keep=50):
+        self.wsgi_app = wsgi_app
+        self.token = token
+        self.directory = directory
+        self.interval = interval
+        self.keep = keep
+
+    def __call__(self, environ, start_response):
+        if not self._requested(environ):
+            return self.wsgi_app(environ, start_response)
+
+        label = _request_label(environ)
+        start = time.perf_counter()
+        with StackSampler(threading.get_ident(), self.interval) as sampler:
+            # Drain the response inside the sampler so streamed bodies count
+            response = self.wsgi_app(environ, start_response)
+            try:
+                body = list(response)
+            finally:
+                if hasattr(response, "close"):
+                    response.close()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime(now))}.{int(now * 1000) % 1000:03d}"
+        name = f"{stamp}-{threading.get_ident() % 10000:04d}-{int(elapsed_ms)}ms-{label}{PROFILE_SUFFIX}"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), "w") as f:
+            f.write(sampler.collapsed())
+        for old in recent_profiles(self.directory)[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass  # Pruned by another thread
+        return body
+
+    def _requested(self, environ):
+        supplied = environ.get(PROFILE_HEADER)
+        return supplied is not None and _token_matches(supplied, self.token)
+
+
+def _token_matches(supplied, token):
+    return hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _link_signature(token, name, expires):
+    message = f"{name}:{expires}".encode()
+    return hmac.new(token.encode(), message, hashlib.sha256).hexdigest()
+
+
+def recent_profiles(directory):
+    """Profile file names in directory, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    names = [n for n in os.listdir(directory) if n.endswith(PROFILE_SUFFIX)]
+    # Names start with a UTC millisecond timestamp, so they sort by age
+    return sorted(names, reverse=True)
+
+
+def _request_label(environ):
+    """Short file-name-safe label: the callback output for Dash callbacks, else the path.
+
+    The body is only peeked at when its length is known; a chunked request
+    keeps its stream untouched and is labelled by its path.
+    """
+    label = environ.get("PATH_INFO", "/")
+    if label == "/_dash-update-component" and environ.get("CONTENT_LENGTH", "").isdigit():
+        length = int(environ["CONTENT_LENGTH"])
+        body = environ["wsgi.input"].read(length)
+        environ["wsgi.input"] = io.BytesIO(body)
+        try:
+            label = json.loads(body).get("output", label)
+        except ValueError:
+            pass
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_.")[:80] or "root"
+
+
+# --- Installation ---
+def install_profiler(server, token, directory, interval=0.001, keep=50):
+    """Wrap a Flask server with the profiling middleware and admin routes."""
+    server.wsgi_app = ProfilingMiddleware(server.wsgi_app, token, directory, interval, keep)
+
+    def check_token():
+        if not _token_matches(request.headers.get("X-Profile", ""), token):
+            abort(403)
+
+    @server.route("/admin/profiles")
+    def list_profiles():
+        """List the most recent profiles, newest first, with signed download links."""
+        check_token()
+        expires = int(time.time()) + LINK_TTL
+        rows = "".join(
+            f'<li><a href="/admin/profiles/{quote(n)}?expires={expires}&sig={_link_signature(token, n, expires)}">'
+            f'{n}</a> ({os.path.getsize(os.path.join(directory, n)):,} bytes)</li>'
+            for n in recent_profiles(directory)
+        )
+        return f"<h3>Recent profiles</h3><ul>{rows or '<li>No profiles yet.</li>'}</ul>"
+
+    @server.route("/admin/profiles/<name>")
+    def download_profile(name):
+        """Serve one collapsed-stack file, to the token header or a signed link."""
+        if request.headers.get("X-Profile") is not None:
+            check_token()
+        else:
+            expires = request.args.get("expires", "")
+            signature = request.args.get("sig", "")
+            if not expires.isdigit() or int(expires) < time.time() or not hmac.compare_digest(
+                    signature.encode(), _link_signature(token, name, int(expires)).encode()):
+                abort(403)
+        if not name.endswith(PROFILE_SUFFIX):
+            abort(404)
+        return send_from_directory(directory, name, mimetype="text/plain")
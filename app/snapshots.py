@@ -0,0 +1,225 @@
+"""
+Data Snapshots
+--------------
+Versioned data snapshots with atomic switching and in-process hot swap.
+
+A snapshot root looks like this:
+
+    SNAPSHOT_ROOT/
+        CURRENT                  name of the active version
+        versions/
+            20261019-101500-1a2b/
+                components/      pbc.csv, hsc.csv, ea.csv
+                history/         optional history store (see ingest.py)
+
+`publish_snapshot` copies new data into a fresh version directory, validates
+it, and only then flips CURRENT with an atomic rename. Version directories are
+never modified after publishing.
+
+Each worker holds a `SnapshotManager`. Between requests it checks whether
+CURRENT has changed (one stat call), loads and validates the new version while
+other threads keep serving the old one, then swaps a single reference.
+Requests that started on the old snapshot finish on it. Derived data (loaded
+catalogs, table pages) is cached on the Snapshot object itself, so it is
+dropped together with the snapshot.
+
+Usage, from the app directory:
+
+    python snapshots.py SNAPSHOT_ROOT --components DIR [--history DIR]
+"""
+
+# --- Imports ---
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from types import MappingProxyType
+
+from catalog import load_catalog
+from ingest import MANIFEST, HistoryStore
+
+CATALOG_TABLES = ("pbc", "hsc", "ea")
+POINTER = "CURRENT"
+VERSIONS = "versions"
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot's data is incomplete."""
+
+
+# --- Snapshots ---
+class Snapshot:
+    """One immutable version of the app's data plus its derived caches."""
+
+    def __init__(self, version, catalog_files, history_dir=None):
+        self.version = version
+        self.catalog_files = MappingProxyType(dict(catalog_files))
+        has_history = history_dir and os.path.exists(os.path.join(history_dir, MANIFEST))
+        self.history = HistoryStore(history_dir) if has_history else None
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root, version):
+        """Load and validate a published version; raises if it is broken or incomplete."""
+        directory = os.path.join(root, VERSIONS, version)
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"Snapshot version {version!r} not found in {root}")
+        components = os.path.join(directory, "components")
+        snapshot = cls(
+            version,
+            {table: _catalog_path(components, table) for table in CATALOG_TABLES},
+            os.path.join(directory, "history")
+        )
+        # Validate every catalog up front, which also warms the cache
+        for table in snapshot.catalog_files:
+            snapshot.catalog(table)
+        return snapshot
+
+    def derived(self, key, factory):
+        """Return the cached value for key, computing it with factory() once."""
+        with self._lock:
+            if key in self._derived:
+                return self._derived[key]
+        value = factory()
+        with self._lock:
+            return self._derived.setdefault(key, value)
+
+    def catalog(self, table):
+        """The validated catalog DataFrame for a table ("pbc", "hsc", "ea")."""
+        return self.derived(("catalog", table), lambda: load_catalog(
+            self.catalog_files[table], source=f"{self.version}/{table}.csv"))
+
+
+class SnapshotManager:
+    """Track the CURRENT pointer and swap snapshots between requests."""
+
+    def __init__(self, root, fallback, on_swap=None):
+        self.root = root
+        self.on_swap = on_swap
+        self._pointer_key = None
+        self._lock = threading.Lock()
+        self.install(fallback)
+        self.refresh()
+
+    def refresh(self):
+        """Swap to the published version if CURRENT changed; return the active snapshot.
+
+        Only one thread loads a new version; the others carry on with the
+        current snapshot instead of waiting. A version that fails validation
+        is skipped until CURRENT changes again; after an I/O error (say, a
+        version pruned while this worker lagged behind) the next request
+        retries.
+        """
+        try:
+            stat = os.stat(os.path.join(self.root, POINTER))
+        except FileNotFoundError:
+            return self.current
+        key = (stat.st_ino, stat.st_mtime_ns)
+        if key == self._pointer_key or not self._lock.acquire(blocking=False):
+            return self.current
+
+        version = None
+        try:
+            version = read_pointer(self.root)
+            if version != self.current.version:
+                self.install(Snapshot.load(self.root, version))
+            self._pointer_key = key
+        except OSError as e:
+            logger.warning("Could not switch to snapshot %r, will retry: %s", version, e)
+        except ValueError as e:
+            # Broken data (e.g. CatalogValidationError) will not fix itself:
+            # keep serving the old snapshot until CURRENT changes again
+            logger.error("Snapshot %r failed validation: %s", version, e)
+            self._pointer_key = key
+        finally:
+            self._lock.release()
+        return self.current
+
+    def install(self, snapshot):
+        """Make snapshot the active one."""
+        self.current = snapshot
+        if self.on_swap is not None:
+            self.on_swap(snapshot)
+        logger.info("Switched to data snapshot %s", snapshot.version)
+
+
+# --- Publishing ---
+def read_pointer(root):
+    """Name of the version CURRENT points to."""
+    with open(os.path.join(root, POINTER)) as f:
+        return f.read().strip()
+
+
+def _catalog_path(components_dir, table):
+    """Path of a table's catalog file, which every snapshot must have."""
+    path = os.path.join(components_dir, f"{table}.csv")
+    if not os.path.isfile(path):
+        raise SnapshotError(f"{components_dir} has no {table}.csv; a snapshot needs all of {CATALOG_TABLES}")
+    return path
+
+
+def publish_snapshot(root, components_dir, history_dir=None, version=None, keep=3):
+    """Copy data into a new version, validate it, and point CURRENT at it.
+
+    Every table in CATALOG_TABLES must be present and valid; otherwise a
+    SnapshotError or CatalogValidationError is raised and CURRENT is left
+    alone. Returns the new version name. The `keep` most recent versions are kept so
+    requests still running on an older snapshot are not disturbed.
+    """
+    version = version or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
+    versions = os.path.join(root, VERSIONS)
+    staging = os.path.join(versions, f".staging-{version}")
+    os.makedirs(versions, exist_ok=True)
+
+    try:
+        os.makedirs(os.path.join(staging, "components"))
+        for table in CATALOG_TABLES:
+            source = _catalog_path(components_dir, table)
+            load_catalog(source)
+            shutil.copy2(source, os.path.join(staging, "components", f"{table}.csv"))
+        if history_dir is not None:
+            shutil.copytree(history_dir, os.path.join(staging, "history"))
+        os.rename(staging, os.path.join(versions, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Flip the pointer atomically
+    tmp = os.path.join(root, f".{POINTER}.{version}.tmp")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(root, POINTER))
+
+    _prune(versions, keep, current=version)
+    return version
+
+
+def _prune(versions, keep, current):
+    """Delete all but the `keep` newest published versions."""
+    published = sorted(
+        (n for n in os.listdir(versions) if not n.startswith(".")),
+        key=lambda n: os.path.getmtime(os.path.join(versions, n)),
+        reverse=True
+    )
+    for name in published[keep:]:
+        if name != current:
+            shutil.rmtree(os.path.join(versions, name), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Publish a new data snapshot.")
+    parser.add_argument("root")
+    parser.add_argument("--components", required=True, help="directory with pbc.csv, hsc.csv, ea.csv")
+    parser.add_argument("--history", help="history store directory from ingest.py")
+    parser.add_argument("--version")
+    parser.add_argument("--keep", type=int, default=3)
+    args = parser.parse_args()
+
+    print(publish_snapshot(args.root, args.components, args.history, args.version, args.keep))
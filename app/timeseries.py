@@ -0,0 +1,164 @@
+"""
+Time-series Downsampling
+------------------------
+Server-side decimation of indicator histories for the region comparison view.
+
+Plotting every point of hundreds of regional series freezes the browser, so
+series are reduced to roughly one point per horizontal pixel before they are
+sent. Two methods are available:
+
+- "lttb": Largest-Triangle-Three-Buckets, keeps the visual shape of a line
+- "minmax": keeps the lowest and highest point of each bucket, never hides spikes
+
+Histories come from a pluggable history source passed to `decimated_series`.
+Decimated series are cached per source, variable, region set, resolution and
+window.
+"""
+
+# --- Imports ---
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+# --- Downsampling ---
+def _as_float(x):
+    """Return x as a float array, mapping datetimes to nanoseconds."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb_indices(x, y, n_out):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The remaining points are split
+    into n_out - 2 buckets, and each bucket keeps the point forming the
+    largest triangle with the previously kept point and the next bucket's mean.
+
+    `y` may be 2-D (one row per series sharing `x`), in which case all series
+    are decimated in a single pass and a 2-D index array is returned.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.broadcast_to(np.arange(n), np.shape(y)).copy()
+
+    x = _as_float(x)
+    ys = np.atleast_2d(np.asarray(y, dtype=float))
+    rows = np.arange(len(ys))
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(int), n)
+
+    # Mean of every bucket; the last "bucket" is the final point
+    starts = edges[:-1]
+    counts = np.maximum(np.diff(edges), 1)
+    avg_x = np.add.reduceat(x, starts) / counts
+    avg_y = np.add.reduceat(ys, starts, axis=1) / counts
+
+    kept = np.empty((len(ys), n_out), dtype=np.int64)
+    kept[:, 0], kept[:, -1] = 0, n - 1
+    prev = np.zeros(len(ys), dtype=np.int64)
+    for b in range(n_out - 2):
+        start, stop = edges[b], edges[b + 1]
+        if stop > start:
+            # Twice the triangle area for every candidate in the bucket
+            px, py = x[prev][:, None], ys[rows, prev][:, None]
+            area = np.abs(
+                (px - avg_x[b + 1]) * (ys[:, start:stop] - py)
+                - (px - x[start:stop]) * (avg_y[:, b + 1:b + 2] - py)
+            )
+            prev = start + np.argmax(np.nan_to_num(area, nan=-1.0), axis=1)
+        kept[:, b + 1] = prev
+    return kept if np.ndim(y) == 2 else kept[0]
+
+
+def minmax_indices(x, y, n_out):
+    """Indices of the minimum and maximum point in each of n_out // 2 buckets."""
+    n = len(x)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    bucket = np.arange(n) * n_buckets // n
+
+    # Sort by (bucket, y): the first and last entry of each bucket are its
+    # minimum and maximum. Missing values sort last and are skipped.
+    valid = ~np.isnan(y)
+    order = np.flatnonzero(valid)[np.lexsort((y[valid], bucket[valid]))]
+    bounds = np.flatnonzero(np.diff(bucket[order], prepend=-1, append=n_buckets))
+    lows, highs = order[bounds[:-1]], order[bounds[1:] - 1]
+    return np.union1d(lows, highs)
+
+
+def downsample(x, y, n_out, method="lttb"):
+    """Reduce a series to at most n_out points, returning (x, y)."""
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method {method!r}; expected one of {DOWNSAMPLE_METHODS}")
+    pick = lttb_indices if method == "lttb" else minmax_indices
+    idx = pick(x, y, n_out)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
+
+def window_slice(x, window):
+    """Slice of x inside window = (start, end), plus one point either side."""
+    if window is None:
+        return slice(None)
+    x_float = _as_float(x)
+    start, end = window
+    if np.issubdtype(np.asarray(x).dtype, np.datetime64):
+        start, end = _as_float([pd.Timestamp(v).to_datetime64() for v in (start, end)])
+    lo = max(np.searchsorted(x_float, float(start), side="left") - 1, 0)
+    hi = min(np.searchsorted(x_float, float(end), side="right") + 1, len(x_float))
+    return slice(lo, hi)
+
+
+# --- History Source ---
+# Any object with:
+#   variables()                -> list of variable names
+#   regions(variable)          -> list of region codes with data for the variable
+#   series(variable, regions)  -> {region: (x, y)} with x sorted ascending
+# The source is passed in by the caller (the app pins one per request), and
+# cached series are keyed by it, so results from two sources never mix.
+@lru_cache(maxsize=256)
+def decimated_series(source, variable, regions, resolution, window=None, method="lttb"):
+    """Downsampled histories from `source` for one variable and a tuple of regions.
+
+    `resolution` is the target number of points per series (the plot's pixel
+    width) and `window` an optional (start, end) range from a zoom. The
+    result is cached and shared between threads, so it is returned read-only.
+    """
+    if source is None:
+        return MappingProxyType({})
+    series = source.series(variable, list(regions))
+    result = {}
+
+    # Regions sharing one time axis are decimated together in one LTTB pass
+    if method == "lttb" and series:
+        first_x = np.asarray(next(iter(series.values()))[0])
+        if all(np.array_equal(np.asarray(x), first_x) for x, _ in series.values()):
+            keep = window_slice(first_x, window)
+            x = first_x[keep]
+            ys = np.array([np.asarray(y, dtype=float)[keep] for _, y in series.values()])
+            idx = lttb_indices(x, ys, resolution)
+            for (region, _), row, y in zip(series.items(), idx, ys):
+                result[region] = x[row], y[row]
+            return _read_only(result)
+
+    for region, (x, y) in series.items():
+        keep = window_slice(x, window)
+        x, y = np.asarray(x)[keep], np.asarray(y)[keep]
+        result[region] = downsample(x, y, resolution, method)
+    return _read_only(result)
+
+
+def _read_only(result):
+    """Freeze a {region: (x, y)} result before it goes into the cache."""
+    for x, y in result.values():
+        x.setflags(write=False)
+        y.setflags(write=False)
+    return MappingProxyType(result)
@@ -0,0 +1,12 @@
+"""
+Test Setup
+----------
+The app's modules import each other flat from the app directory (as app.py
+does when served), so the tests put that directory on sys.path.
+"""
+
+import os
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_DIR)
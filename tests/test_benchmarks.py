@@ -0,0 +1,55 @@
+"""Callback micro-benchmarks against the stored baselines (see app/bench_callbacks.py).
+
+Each building block is timed on the real catalog and on catalogs scaled 10x,
+100x and 1000x. A case fails when its median exceeds its budget or has no
+baseline. They are deselected by default (see pytest.ini); run them with
+`python -m pytest -m benchmark`. Medians are written as JSON to
+$BENCH_OUTPUT, or to the pytest temporary directory when it is unset.
+Re-record baselines with `python bench_callbacks.py --update-baseline`.
+"""
+
+import json
+import os
+
+import pytest
+
+import app
+import bench_callbacks as bench
+
+pytestmark = pytest.mark.benchmark
+
+STORED = bench.load_baseline()
+
+
+@pytest.fixture(scope="session")
+def results(tmp_path_factory):
+    collected = {}
+    yield collected
+    output = os.environ.get("BENCH_OUTPUT") or str(tmp_path_factory.getbasetemp() / "bench_results.json")
+    with open(output, "w") as f:
+        json.dump({"results": collected}, f, indent=2)
+
+
+@pytest.fixture(scope="module", params=bench.SCALES, ids=lambda scale: f"{scale}x")
+def scaled(request, tmp_path_factory):
+    """Run a scale's benchmarks against scaled data, then put the real data back."""
+    saved = app.pillars_data, app.influence_graph, app.shock_matrix, app.snapshots.current
+    bench.use_scale(request.param, str(tmp_path_factory.mktemp("catalogs")))
+    yield request.param, dict(bench.benchmarks())
+    app.pillars_data, app.influence_graph, app.shock_matrix = saved[:3]
+    app.snapshots.install(saved[3])
+
+
+@pytest.mark.parametrize("name", bench.BENCHMARK_NAMES)
+def test_within_budget(scaled, name, results):
+    scale, benchmarks = scaled
+    key = f"{name}[{scale}x]"
+    median, runs, calibration = bench.measure(benchmarks[name])
+    results[key] = {"median_s": median, "runs": runs, "calibration_s": calibration}
+    assert bench.compare(
+        {key: results[key]},
+        STORED.get("baseline_s", {}),
+        STORED.get("tolerance", bench.DEFAULT_TOLERANCE),
+        STORED.get("floor_s", bench.DEFAULT_FLOOR),
+        STORED.get("calibration_s")
+    ) == []
@@ -0,0 +1,90 @@
+"""Catalog loading: schema validation, forward-fill and categorical columns."""
+
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from catalog import CATALOG_COLUMNS, CATEGORICAL_COLUMNS, HIERARCHY_COLUMNS, CatalogValidationError, load_catalog
+from conftest import APP_DIR
+
+HEADER = ",".join(CATALOG_COLUMNS) + "\n"
+
+
+def csv(*rows):
+    return io.StringIO(HEADER + "".join(row + "\n" for row in rows))
+
+
+def errors(*rows):
+    with pytest.raises(CatalogValidationError) as info:
+        load_catalog(csv(*rows), source="test.csv")
+    return info.value.errors
+
+
+def test_forward_fill_within_parents():
+    df = load_catalog(csv(
+        "Needs,,,,,",
+        "Housing,Supply,Availability,NUTS 3,Eurostat,",
+        ",,Affordability,NUTS 2,EU-SILC,Price to income",
+        ",Quality,Standards,NUTS 2,EU-SILC,",
+        "Mobility,Transport,Coverage,NUTS 3,UDP,",
+        "Access,,,,,",
+        "Health,Beds,Bed density,NUTS 2/3,Eurostat,",
+    ), source="test.csv")
+
+    assert list(df.columns) == HIERARCHY_COLUMNS + CATALOG_COLUMNS[2:]
+    assert df["Variables"].tolist() == ["Availability", "Affordability", "Standards", "Coverage", "Bed density"]
+    assert df["Section"].tolist() == ["Needs"] * 4 + ["Access"]
+    assert df["Subject"].tolist() == ["Housing", "Housing", "Housing", "Mobility", "Health"]
+    assert df["Component"].tolist() == ["Supply", "Supply", "Quality", "Transport", "Beds"]
+    assert pd.isna(df.loc[0, "Notes"])
+
+
+def test_categorical_dtypes():
+    df = load_catalog(os.path.join(APP_DIR, "components", "pbc.csv"))
+    for column in CATEGORICAL_COLUMNS:
+        assert isinstance(df[column].dtype, pd.CategoricalDtype), column
+    assert df["Variables"].dtype == object
+    assert df[HIERARCHY_COLUMNS].notna().all().all()
+
+
+def test_errors_report_csv_line_numbers():
+    assert errors(
+        "Needs,,,,,",
+        "Housing,Supply,Availability,NUTS 3,Eurostat,",
+        ",,,NUTS 3,Eurostat,",
+        ",,Standards,NUTS 9,,",
+    ) == [
+        (4, "Variables", "missing value"),
+        (5, "Data Source", "missing value"),
+        (5, "Optimal NUTS Level", "invalid NUTS level 'NUTS 9'"),
+    ]
+
+
+def test_bad_header_is_reported_on_line_one():
+    with pytest.raises(CatalogValidationError, match="line 1, header"):
+        load_catalog(io.StringIO("Subject,Component\nx,y\n"), source="test.csv")
+
+
+def test_variable_row_before_first_heading():
+    assert errors("Housing,Supply,Availability,NUTS 3,Eurostat,") == [
+        (2, "Subject", "variable row appears before the first section heading")]
+
+
+def test_section_must_start_with_subject_and_component():
+    assert errors(
+        "Needs,,,,,",
+        ",,Availability,NUTS 3,Eurostat,",
+    ) == [
+        (3, "Component", "first row of a subject must fill in this column"),
+        (3, "Subject", "first row of a section must fill in this column"),
+    ]
+
+
+def test_every_new_subject_must_name_its_component():
+    assert errors(
+        "Needs,,,,,",
+        "Housing,Supply,Availability,NUTS 3,Eurostat,",
+        "Mobility,,Coverage,NUTS 3,UDP,",
+    ) == [(4, "Component", "first row of a subject must fill in this column")]
@@ -0,0 +1,168 @@
+"""Bulk ingestion: local Eurostat-style fixtures read back through HistoryStore."""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from conftest import APP_DIR
+from ingest import COLUMNS, MANIFEST, IngestError, HistoryStore, _column_path, ingest, parse_period
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+WIDE_2021 = os.path.join(FIXTURES, "gdp_2021.tsv")
+WIDE_2022 = os.path.join(FIXTURES, "gdp_2022.tsv")
+LONG_MONTHLY = os.path.join(FIXTURES, "unemployment_monthly.csv")
+MAPPING_FILE = os.path.join(FIXTURES, "mapping.json")
+
+with open(MAPPING_FILE) as f:
+    MAPPINGS = json.load(f)
+
+
+def dates(*labels):
+    return np.array(labels, dtype="datetime64[D]")
+
+
+def flags(store, variable, region):
+    """Flag strings of one series, in time order."""
+    rows, spans = store._rows_for(variable)
+    a, b = spans[store.region_names.index(region)]
+    return [store.flag_names[code] for code in store.columns["flag"][rows[a:b]]]
+
+
+def test_wide_tsv_quarterly_with_flags(tmp_path):
+    stats = ingest([WIDE_2021], MAPPINGS, str(tmp_path), chunk_rows=2)
+    assert stats["rows_read"] == 4
+    assert stats["observations"] == 6  # Two ":" cells skipped, two unmapped rows
+
+    store = HistoryStore(str(tmp_path))
+    assert store.variables() == ["Real GDP"]
+    assert store.regions("Real GDP") == ["DE11", "FR10"]
+
+    series = store.series("Real GDP", ["DE11", "FR10", "XX00"])
+    assert set(series) == {"DE11", "FR10"}
+    x, y = series["DE11"]
+    np.testing.assert_array_equal(x, dates("2021-01-01", "2021-04-01", "2021-10-01"))
+    np.testing.assert_array_equal(y, [101.5, 102.0, 103.25])
+    assert flags(store, "Real GDP", "DE11") == ["", "p", "e"]
+    x, y = series["FR10"]
+    np.testing.assert_array_equal(x, dates("2021-01-01", "2021-07-01", "2021-10-01"))
+    assert flags(store, "Real GDP", "FR10") == ["", "p", ""]
+
+
+def test_sdmx_csv_monthly(tmp_path):
+    stats = ingest([LONG_MONTHLY], MAPPINGS, str(tmp_path))
+    assert (stats["rows_read"], stats["observations"]) == (5, 3)
+
+    store = HistoryStore(str(tmp_path))
+    assert store.variables() == ["Long-term unemployment"]
+    x, y = store.series("Long-term unemployment", ["DE11"])["DE11"]
+    np.testing.assert_array_equal(x, dates("2021-07-01", "2021-08-01"))
+    np.testing.assert_array_equal(y, [3.1, 3.0])
+    assert flags(store, "Long-term unemployment", "DE11") == ["", "p"]
+    x, y = store.series("Long-term unemployment", ["FR10"])["FR10"]
+    np.testing.assert_array_equal(y, [7.2])
+
+
+def test_append_resumes_after_an_interrupted_run(tmp_path):
+    ingest([WIDE_2021, LONG_MONTHLY], MAPPINGS, str(tmp_path))
+    before = HistoryStore(str(tmp_path))
+
+    # An interrupted append leaves partial rows past the manifest's count
+    for name in COLUMNS:
+        with open(_column_path(str(tmp_path), name), "ab") as f:
+            f.write(b"\xff" * 5)
+
+    stats = ingest([WIDE_2022], MAPPINGS, str(tmp_path), append=True)
+    assert stats["observations"] == before.rows + 3
+
+    store = HistoryStore(str(tmp_path))
+    assert store.variables() == ["Real GDP", "Long-term unemployment"]
+    assert store.regions("Real GDP") == ["DE11", "FR10", "ITC1"]
+    x, y = store.series("Real GDP", ["DE11"])["DE11"]
+    np.testing.assert_array_equal(y, [101.5, 102.0, 103.25, 104.0, 105.5])
+    assert x[-1] == np.datetime64("2022-04-01")
+    assert flags(store, "Real GDP", "DE11")[-2:] == ["p", "p"]
+
+    # A reader opened before the append still sees its own, intact rows
+    np.testing.assert_array_equal(before.series("Real GDP", ["DE11"])["DE11"][1], [101.5, 102.0, 103.25])
+
+
+def test_existing_store_is_never_rewritten(tmp_path):
+    ingest([WIDE_2021], MAPPINGS, str(tmp_path))
+    sizes = {name: os.path.getsize(_column_path(str(tmp_path), name)) for name in COLUMNS}
+    with pytest.raises(IngestError, match="already holds a history store"):
+        ingest([WIDE_2022], MAPPINGS, str(tmp_path))
+    assert sizes == {name: os.path.getsize(_column_path(str(tmp_path), name)) for name in COLUMNS}
+
+
+def test_variables_come_from_the_manifest(tmp_path):
+    # Mapped but never matched: interned, yet not a variable with data
+    mappings = MAPPINGS + [{"variable": "Unused", "match": {"unit": "NONE"}}]
+    ingest([WIDE_2021], mappings, str(tmp_path))
+    store = HistoryStore(str(tmp_path))
+    store.columns["variable"] = None  # variables() must not scan the column
+    assert store.variables() == ["Real GDP"]
+
+    # Stores written before the manifest recorded row counts are counted once at open
+    path = os.path.join(str(tmp_path), MANIFEST)
+    with open(path) as f:
+        manifest = json.load(f)
+    del manifest["variable_rows"]
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+    assert HistoryStore(str(tmp_path)).variables() == ["Real GDP"]
+    ingest([LONG_MONTHLY], mappings, str(tmp_path), append=True)
+    assert HistoryStore(str(tmp_path)).variables() == ["Real GDP", "Long-term unemployment"]
+
+
+def test_unknown_variable_has_no_data(tmp_path):
+    ingest([WIDE_2021], MAPPINGS, str(tmp_path))
+    store = HistoryStore(str(tmp_path))
+    assert store.regions("Not ingested") == []
+    assert store.series("Not ingested", ["DE11"]) == {}
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("2021", "2021-01-01"),
+    ("2021Q3", "2021-07-01"),
+    ("2021M07", "2021-07-01"),
+    ("2021-07", "2021-07-01"),
+    ("2021S2", "2021-07-01"),
+    ("2021W05", "2021-02-01"),
+    ("2021-W01", "2021-01-04"),
+    ("2020W53", "2020-12-28"),
+    ("2021-07-15", "2021-07-15"),
+])
+def test_parse_period(label, expected):
+    assert parse_period(label) == np.datetime64(expected)
+
+
+@pytest.mark.parametrize("label", ["2021W54", "2021Q5", "21Q1", "2021X1"])
+def test_unrecognised_period_names_the_label(label):
+    with pytest.raises(IngestError, match=f"unrecognised period label '{label}'"):
+        parse_period(label)
+
+
+def test_unknown_catalog_variable_is_rejected(tmp_path):
+    mappings = [{"variable": "Not a variable", "match": {}}]
+    with pytest.raises(IngestError, match="not a catalog variable"):
+        ingest([WIDE_2021], mappings, str(tmp_path), known_variables={"Real GDP"})
+
+
+def test_command_line_append(tmp_path):
+    store_dir = str(tmp_path / "store")
+    run = lambda *args: subprocess.run([sys.executable, "ingest.py", store_dir, MAPPING_FILE, *args],
+                                       cwd=APP_DIR, capture_output=True, text=True)
+    first = run(WIDE_2021)
+    assert first.returncode == 0, first.stderr
+    assert "rows/sec" in first.stdout
+
+    again = run(WIDE_2022)
+    assert again.returncode != 0 and "already holds a history store" in again.stderr
+
+    appended = run("--append", WIDE_2022)
+    assert appended.returncode == 0, appended.stderr
+    assert HistoryStore(store_dir).regions("Real GDP") == ["DE11", "FR10", "ITC1"]
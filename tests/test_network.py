@@ -0,0 +1,116 @@
+"""Influence network: edge direction, neighbourhood and path queries, node search."""
+
+import json
+
+import numpy as np
+import plotly
+import pytest
+
+import app
+from bench_callbacks import _walk
+from network import InfluenceGraph, _gather, build_influence_graph
+
+SLACK = "ea/Labour Market/Employment Structure/Labor market slack"
+
+PILLARS = {
+    "a": {"title": "A", "subjects": [
+        {"title": "S", "components": [
+            {"title": "C", "variables": ["v1", "v2"]},
+            {"title": "D", "variables": ["v3"]},
+        ]},
+    ]},
+    "b": {"title": "B", "subjects": [
+        {"title": "T", "components": [{"title": "E", "variables": ["w1"]}]},
+    ]},
+}
+
+
+@pytest.fixture
+def graph():
+    return build_influence_graph(PILLARS, {"a-b": {}})
+
+
+def keys(graph, ids):
+    return {graph.keys[i]: d for i, d in ids.items()} if isinstance(ids, dict) else [graph.keys[i] for i in ids]
+
+
+def test_gather_concatenates_csr_rows():
+    indptr = np.array([0, 2, 2, 5, 6])
+    indices = np.array([10, 11, 12, 13, 14, 15])
+    np.testing.assert_array_equal(_gather(indptr, indices, np.array([2, 0, 3])), [12, 13, 14, 10, 11, 15])
+    np.testing.assert_array_equal(_gather(indptr, indices, np.array([1, 3, 1])), [15])
+    assert _gather(indptr, indices, np.array([1])).size == 0
+    assert _gather(indptr, indices, np.array([], dtype=int)).size == 0
+
+
+def test_edges_point_up_the_hierarchy_and_across_pillars(graph):
+    v1 = graph.ids["a/S/C/v1"]
+    assert keys(graph, graph.neighbors(v1, "out")) == ["a/S/C"]
+    assert keys(graph, graph.neighbors(v1, "in")) == []
+    assert keys(graph, graph.neighbors(graph.ids["a"], "out")) == ["b"]
+    assert keys(graph, graph.neighbors(graph.ids["b"], "in")) == ["a", "b/T"]
+    # Nothing flows from pillar b back into a
+    assert keys(graph, graph.neighbors(graph.ids["a"], "in")) == ["a/S"]
+
+
+def test_in_and_out_neighbourhoods_differ_on_the_real_network():
+    graph = app.influence_graph
+    assert any(set(graph.neighbors(i, "in")) != set(graph.neighbors(i, "out")) for i in range(len(graph)))
+    slack = graph.ids[SLACK]
+    influenced = keys(graph, graph.k_hop([slack], 3, "out"))
+    assert influenced == {"ea/Labour Market/Employment Structure": 1, "ea/Labour Market": 2, "ea": 3}
+    assert graph.k_hop([slack], 3, "in") == {}
+
+    # The variables feeding into Labour Market, within 2 hops
+    feeding = keys(graph, graph.k_hop([graph.ids["ea/Labour Market"]], 2, "in"))
+    assert SLACK in feeding and all(d <= 2 for d in feeding.values())
+
+
+def test_k_hop_distances(graph):
+    assert keys(graph, graph.k_hop([graph.ids["a/S/D/v3"]], 10, "out")) == {
+        "a/S/D": 1, "a/S": 2, "a": 3, "b": 4}
+    assert keys(graph, graph.k_hop([graph.ids["b"]], 2, "in")) == {
+        "a": 1, "b/T": 1, "a/S": 2, "b/T/E": 2}
+    # Several sources at once; sources themselves are left out
+    reached = keys(graph, graph.k_hop([graph.ids["a/S/C/v1"], graph.ids["a/S/C"]], 1, "out"))
+    assert reached == {"a/S": 1}
+    assert graph.k_hop([graph.ids["b"]], 0, "in") == {}
+    with pytest.raises(ValueError, match="direction"):
+        graph.k_hop([0], 1, "both")
+
+
+def test_shortest_path(graph):
+    path = graph.shortest_path(graph.ids["a/S/C/v2"], graph.ids["b"])
+    assert keys(graph, path) == ["a/S/C/v2", "a/S/C", "a/S", "a", "b"]
+    assert graph.shortest_path(graph.ids["b/T/E/w1"], graph.ids["a"]) is None
+    assert keys(graph, graph.shortest_path(graph.ids["a"], graph.ids["a/S/D/v3"], "in")) == [
+        "a", "a/S", "a/S/D", "a/S/D/v3"]
+    assert graph.shortest_path(graph.ids["a"], graph.ids["a"]) == [graph.ids["a"]]
+
+
+def test_shortest_path_takes_fewest_hops():
+    # 0 -> 1 -> 2 -> 3 and a shortcut 0 -> 3
+    graph = InfluenceGraph("wxyz", "wxyz", ["variable"] * 4, [0, 1, 2, 0], [1, 2, 3, 3])
+    assert graph.shortest_path(0, 3) == [0, 3]
+    assert graph.shortest_path(3, 0, "in") == [3, 0]
+    assert graph.shortest_path(1, 0) is None
+
+
+def test_node_dropdowns_load_options_on_demand():
+    panels = [app.create_network_query_panel(), app.create_shock_simulator_panel()]
+    dropdowns = {c.id: c for panel in panels for c in _walk(panel) if "node" in str(getattr(c, "id", ""))}
+    assert set(dropdowns) == {"network-node", "shock-node"}
+    assert len(dropdowns["network-node"].options) == 0
+    assert len(dropdowns["shock-node"].options) == 1
+    assert "Labor market slack" not in json.dumps(panels, cls=plotly.utils.PlotlyJSONEncoder)
+
+    options = app.update_network_node_options("slack", None)
+    assert [o["value"] for o in options] == [SLACK]
+    assert app.update_network_node_options(None, SLACK) == [app.node_option(SLACK)]
+    # The selection stays listed, and the list is capped
+    options = app.update_network_target_options("a", SLACK)
+    assert options[0]["value"] == SLACK and len(options) == app.NODE_SEARCH_LIMIT
+    # Only components and variables can be shocked
+    shockable = app.update_shock_node_options("employment", None)
+    assert shockable and all(app.influence_graph.kind(app.influence_graph.ids[o["value"]]) in app.SHOCKABLE_KINDS
+                             for o in shockable)
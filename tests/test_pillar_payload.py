@@ -0,0 +1,117 @@
+"""Pillar view payload: subject bodies are deferred until a subject opens."""
+
+import json
+
+import dash
+import plotly
+import pytest
+
+import app
+from bench_callbacks import in_callback_context
+from bench_serving import _id_str, subject_toggle
+
+N_VARIABLES = 10_000
+COMPONENTS_PER_SUBJECT = 2
+
+
+def synthetic_pillars(subjects_per_pillar, n_variables=N_VARIABLES):
+    """The real pillars with their subjects replaced by synthetic ones."""
+    n_subjects = subjects_per_pillar * len(app.pillars_data)
+    per_component = n_variables // (n_subjects * COMPONENTS_PER_SUBJECT)
+    return app.freeze({
+        pillar_id: {
+            **pillar,
+            "subjects": [
+                {
+                    "title": f"{pillar_id} subject {s}",
+                    "components": [
+                        {
+                            "title": f"{pillar_id} component {s}.{c}",
+                            "variables": [f"{pillar_id} variable {s}.{c}.{v}" for v in range(per_component)]
+                        }
+                        for c in range(COMPONENTS_PER_SUBJECT)
+                    ]
+                }
+                for s in range(subjects_per_pillar)
+            ]
+        }
+        for pillar_id, pillar in app.pillars_data.items()
+    })
+
+
+@pytest.fixture
+def use_pillars(monkeypatch):
+    """Point the app at a given pillars mapping for the duration of a test."""
+    def use(pillars):
+        monkeypatch.setattr(app, "pillars_data", pillars)
+        return pillars
+    return use
+
+
+def payload_bytes(component):
+    return len(json.dumps(component, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def toggle(pillar, index, clicks, is_open, rendered):
+    """Call toggle_collapse as if a subject's button had been clicked."""
+    button = app.subject_id("button", pillar, index)
+    triggered = [{"prop_id": f"{_id_str(button)}.n_clicks", "value": clicks}]
+    return in_callback_context(app.toggle_collapse, clicks, is_open, rendered, triggered=triggered)
+
+
+@pytest.mark.parametrize("subjects_per_pillar", [2, 20, 200])
+def test_initial_payload_has_no_variables(use_pillars, subjects_per_pillar):
+    use_pillars(synthetic_pillars(subjects_per_pillar))
+    text = json.dumps(app.create_pillar_view(), cls=plotly.utils.PlotlyJSONEncoder)
+    assert "variable" not in text
+    # Roughly 1.5 kB of buttons, collapses and flags per subject, whatever the variable count
+    assert len(text) < 1_500 * subjects_per_pillar * len(app.pillars_data) + 5_000
+
+
+def test_initial_payload_independent_of_variable_count(use_pillars):
+    use_pillars(synthetic_pillars(20, n_variables=120))
+    small = payload_bytes(app.create_pillar_view())
+    use_pillars(synthetic_pillars(20, n_variables=N_VARIABLES))
+    large = payload_bytes(app.create_pillar_view())
+    assert large == small
+
+
+def test_first_open_sends_body_and_later_toggles_do_not(use_pillars):
+    pillars = use_pillars(synthetic_pillars(2))
+    subject = pillars["pbc"]["subjects"][1]
+
+    is_open, body, rendered = toggle("pbc", 1, clicks=1, is_open=False, rendered=False)
+    assert (is_open, rendered) == (True, True)
+    assert payload_bytes(body) == payload_bytes(app.create_subject_body(subject))
+    assert "pbc variable 1.1.0" in json.dumps(body, cls=plotly.utils.PlotlyJSONEncoder)
+
+    assert toggle("pbc", 1, clicks=2, is_open=True, rendered=True) == (False, dash.no_update, dash.no_update)
+    assert toggle("pbc", 1, clicks=3, is_open=False, rendered=True) == (True, dash.no_update, dash.no_update)
+
+
+def test_lost_first_response_is_rendered_again(use_pillars):
+    use_pillars(synthetic_pillars(2))
+    # The first click's response never arrived: the collapse is shut and the flag unset
+    is_open, body, rendered = toggle("ea", 0, clicks=2, is_open=False, rendered=False)
+    assert (is_open, rendered) == (True, True)
+    assert len(body) == COMPONENTS_PER_SUBJECT
+
+
+def test_request_carries_only_the_clicked_subject(use_pillars):
+    pillars = use_pillars(synthetic_pillars(200))
+    client = app.server.test_client()
+    subject = pillars["hsc"]["subjects"][150]
+
+    first = subject_toggle("hsc", 150, clicks=1, is_open=False, rendered=False)
+    response = client.post("/_dash-update-component", data=first, content_type="application/json")
+    assert response.status_code == 200
+    outputs = response.get_json()["response"]
+    assert outputs[_id_str(app.subject_id("rendered", "hsc", 150))] == {"data": True}
+    assert subject["components"][0]["variables"][0] in response.get_data(as_text=True)
+
+    # Closing it again with every subject already open and rendered: the request
+    # is the same few hundred bytes as the first, and nothing is sent back but is_open
+    later = subject_toggle("hsc", 150, clicks=2, is_open=True, rendered=True)
+    assert len(later) < 1_000 and abs(len(later) - len(first)) < 10
+    response = client.post("/_dash-update-component", data=later, content_type="application/json")
+    assert response.get_json()["response"] == {_id_str(app.subject_id("collapse", "hsc", 150)): {"is_open": False}}
@@ -0,0 +1,98 @@
+"""Request profiler: admin routes never take the token in a URL; old profiles are pruned."""
+
+import io
+import re
+import time
+
+import pytest
+from flask import Flask
+from werkzeug.test import EnvironBuilder
+
+import profiling
+from profiling import ProfilingMiddleware, install_profiler
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = Flask(__name__)
+
+    @server.route("/work")
+    def work():
+        time.sleep(0.005)
+        return "done"
+
+    install_profiler(server, TOKEN, str(tmp_path), keep=3)
+    return server
+
+
+def profile_requests(client, n):
+    for _ in range(n):
+        assert client.get("/work", headers={"X-Profile": TOKEN}).data == b"done"
+        time.sleep(0.002)  # Distinct millisecond timestamps
+
+
+def test_only_newest_profiles_are_kept(server, tmp_path):
+    client = server.test_client()
+    client.get("/work")
+    assert not list(tmp_path.iterdir())
+    profile_requests(client, 5)
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert len(names) == 3
+    assert all(n.endswith("-work.collapsed") for n in names)
+
+
+def test_only_the_header_triggers_profiling(server, tmp_path):
+    client = server.test_client()
+    assert client.get(f"/work?__profile={TOKEN}").data == b"done"
+    assert client.get("/work", headers={"X-Profile": "wrong"}).data == b"done"
+    assert not list(tmp_path.iterdir())
+
+
+def test_chunked_callback_body_is_left_intact(tmp_path):
+    def echo(environ, start_response):
+        start_response("200 OK", [])
+        return [environ["wsgi.input"].read()]
+
+    middleware = ProfilingMiddleware(echo, TOKEN, str(tmp_path))
+    body = b'{"output": "data-table-container.children"}'
+    for length in (None, str(len(body))):
+        environ = EnvironBuilder("/_dash-update-component", method="POST",
+                                 headers={"X-Profile": TOKEN}).get_environ()
+        environ["wsgi.input"] = io.BytesIO(body)
+        environ.pop("CONTENT_LENGTH", None)
+        if length is not None:
+            environ["CONTENT_LENGTH"] = length
+        assert middleware(environ, lambda status, headers: None) == [body]
+        time.sleep(0.002)
+
+    # Without a length the profile is labelled by its path
+    labels = sorted(p.name.split("ms-", 1)[1] for p in tmp_path.iterdir())
+    assert labels == ["dash-update-component.collapsed", "data-table-container.children.collapsed"]
+
+
+def test_listing_requires_the_header(server):
+    client = server.test_client()
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get(f"/admin/profiles?token={TOKEN}").status_code == 403
+    assert client.get(f"/admin/profiles?__profile={TOKEN}").status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Profile": "wrong"}).status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Profile": TOKEN}).status_code == 200
+
+
+def test_signed_links_do_not_carry_the_token(server, monkeypatch):
+    client = server.test_client()
+    profile_requests(client, 1)
+    listing = client.get("/admin/profiles", headers={"X-Profile": TOKEN}).get_data(as_text=True)
+    assert TOKEN not in listing
+    link = re.search(r'href="([^"]+)"', listing).group(1).replace("&amp;", "&")
+
+    response = client.get(link)
+    assert response.status_code == 200 and b"work" in response.data
+
+    # Tampered and expired links are refused
+    name = link.split("?")[0].rsplit("/", 1)[1]
+    assert client.get(link.replace(name, "other.collapsed")).status_code == 403
+    monkeypatch.setattr(profiling.time, "time", lambda: time.monotonic() + 10 ** 10)
+    assert client.get(link).status_code == 403
@@ -0,0 +1,41 @@
+"""Serving: a fresh worker process handles concurrent first requests."""
+
+import json
+import subprocess
+import sys
+
+from conftest import APP_DIR
+
+# Runs in a fresh interpreter, like a newly forked worker: every request mix
+# entry is sent by several threads at once as the process's first requests
+FIRST_REQUESTS = """
+import json, threading
+import app
+from bench_serving import request_mix
+
+mix = request_mix() * 4
+barrier = threading.Barrier(len(mix))
+statuses = []
+
+def send(method, path, body):
+    client = app.server.test_client()
+    barrier.wait()
+    response = client.open(path, method=method, data=body, content_type="application/json")
+    statuses.append(response.status_code)
+
+threads = [threading.Thread(target=send, args=entry) for entry in mix]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print(json.dumps(statuses))
+"""
+
+
+def test_concurrent_first_requests_on_fresh_worker():
+    for _ in range(3):
+        result = subprocess.run([sys.executable, "-c", FIRST_REQUESTS], cwd=APP_DIR,
+                                capture_output=True, text=True, timeout=300)
+        assert result.returncode == 0, result.stderr
+        statuses = json.loads(result.stdout.splitlines()[-1])
+        assert statuses == [200] * len(statuses)
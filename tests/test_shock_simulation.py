@@ -0,0 +1,56 @@
+"""Shock simulator: propagation through the transfer matrix and the Run callback."""
+
+import numpy as np
+import pytest
+
+import app
+from simulation import make_shock, simulate
+
+NODE = "pbc/Access/Digital Infrastructure/Broadband coverage"
+
+
+def dense(matrix, n):
+    indptr, indices, data = matrix
+    a = np.zeros((n, n))
+    for row in range(n):
+        a[row, indices[indptr[row]:indptr[row + 1]]] += data[indptr[row]:indptr[row + 1]]
+    return a
+
+
+def test_levels_follow_the_recurrence_and_settle():
+    graph = app.influence_graph
+    shock = make_shock(graph, NODE, 0.1)
+    a = dense(app.shock_matrix, len(graph))
+    levels = simulate(app.shock_matrix, shock, 60)
+
+    np.testing.assert_allclose(levels[0], shock)
+    np.testing.assert_allclose(levels[1], shock + a @ shock)
+    np.testing.assert_allclose(levels[-1], np.linalg.solve(np.eye(len(graph)) - a, shock), atol=1e-9)
+    # The shock reaches every pillar, its own first
+    pillars = [graph.ids[p] for p in app.pillars_data]
+    np.testing.assert_allclose(simulate(app.shock_matrix, shock, 60, nodes=pillars), levels[:, pillars])
+    assert levels[-1, graph.ids["pbc"]] > levels[-1, graph.ids["hsc"]] > 0
+
+
+def test_run_returns_one_row_per_period():
+    results, n_intervals, disabled = app.run_shock_simulation(1, NODE, 10, 4)
+    assert (n_intervals, disabled) == (0, False)
+    assert results["pillars"] == list(app.pillars_data)
+    assert np.shape(results["levels"]) == (4, len(app.pillars_data))
+    assert results["levels"][0] == [0, 0, 0]
+
+
+@pytest.mark.parametrize("periods, expected", [(10_000, app.SHOCK_MAX_PERIODS), (-3, 1), ("7", 7)])
+def test_periods_are_clamped_on_the_server(periods, expected):
+    results, _, _ = app.run_shock_simulation(1, NODE, 10, periods)
+    assert len(results["levels"]) == expected
+
+
+@pytest.mark.parametrize("node, size, periods", [
+    ("not/a/node", 10, 4),
+    ("pbc", 10, 4),  # Pillars and subjects are not offered as shocks
+    (NODE, None, 4),
+    (NODE, 10, None),
+])
+def test_invalid_input_gives_empty_state(node, size, periods):
+    assert app.run_shock_simulation(1, node, size, periods) == (None, 0, True)
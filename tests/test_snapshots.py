@@ -0,0 +1,181 @@
+"""Data snapshots: publishing, hot swap under concurrent load, per-request pinning."""
+
+import json
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+import app
+from bench_callbacks import in_callback_context
+from bench_hot_swap import write_components
+from bench_serving import _callback
+from catalog import CatalogValidationError
+from ingest import ingest
+from snapshots import POINTER, VERSIONS, Snapshot, SnapshotError, SnapshotManager, publish_snapshot, read_pointer
+from test_ingest import MAPPINGS, WIDE_2021, WIDE_2022
+
+TABLE_REQUEST = _callback([("data-table-container", "children")], [("table-selector", "value", "pbc")])
+
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path / "snapshots")
+
+
+@pytest.fixture
+def publish(tmp_path, root):
+    """Publish version v<n> of the bundled catalogs, marked with n."""
+    def publish(n, history_dir=None):
+        staging = tmp_path / f"incoming-{n}"
+        staging.mkdir()
+        write_components(str(staging), n)
+        return publish_snapshot(root, str(staging), history_dir, version=f"v{n:03d}", keep=100)
+    return publish
+
+
+@pytest.fixture
+def manager(root, monkeypatch):
+    """A SnapshotManager on `root`, installed as the app's."""
+    manager = SnapshotManager(root, fallback=app.snapshots.current,
+                              on_swap=lambda snapshot: app.decimated_series.cache_clear())
+    monkeypatch.setattr(app, "snapshots", manager)
+    return manager
+
+
+def test_refresh_under_concurrent_load(publish, manager):
+    publish(0)
+    assert manager.refresh().version == "v000"
+    responses, errors = [], []
+    stop = threading.Event()
+
+    def client():
+        client = app.server.test_client()
+        while not stop.is_set():
+            try:
+                response = client.post("/_dash-update-component", data=TABLE_REQUEST,
+                                       content_type="application/json")
+                assert response.status_code == 200, response.status_code
+                version = response.headers["X-Data-Version"]
+                responses.append((version, f"swap-marker-{int(version[1:])}" in response.get_data(as_text=True)))
+            except Exception as e:
+                errors.append(repr(e))
+
+    threads = [threading.Thread(target=client) for _ in range(8)]
+    for t in threads:
+        t.start()
+    try:
+        for n in range(1, 6):
+            time.sleep(0.3)
+            publish(n)
+        time.sleep(0.5)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+    assert errors == []
+    # Every response carries the data of the version it is tagged with
+    assert responses and all(consistent for _, consistent in responses)
+    seen = {version for version, _ in responses}
+    assert {"v003", "v004", "v005"} <= seen
+    assert responses[-1][0] == "v005"
+
+
+def test_request_keeps_its_history_across_a_swap(tmp_path, publish, manager):
+    history = str(tmp_path / "history")
+    ingest([WIDE_2021], MAPPINGS, history)
+    publish(1, history)
+    ingest([WIDE_2022], MAPPINGS, history, append=True)
+
+    def compare():
+        figure, _ = in_callback_context(app.update_comparison, ["Real GDP"], ["DE11"], None, 1200, None)
+        return [len(trace.y) for trace in figure.data]
+
+    with app.server.test_request_context("/"):
+        app.pin_snapshot()
+        assert compare() == [3]
+        # Another thread picks up a new version mid-request
+        publish(2, history)
+        assert manager.refresh().version == "v002"
+        assert compare() == [3]
+
+    with app.server.test_request_context("/"):
+        app.pin_snapshot()
+        assert compare() == [5]
+
+
+def test_io_error_is_retried(root, publish, manager):
+    publish(1)
+    assert manager.refresh().version == "v001"
+
+    # CURRENT points at a version this worker cannot read yet
+    with open(os.path.join(root, POINTER), "w") as f:
+        f.write("v002")
+    assert manager.refresh().version == "v001"
+    shutil.copytree(os.path.join(root, VERSIONS, "v001"), os.path.join(root, VERSIONS, "v002"))
+    assert manager.refresh().version == "v002"
+
+
+def test_invalid_version_is_skipped_until_current_changes(root, publish, manager):
+    publish(1)
+    assert manager.refresh().version == "v001"
+    bad = os.path.join(root, VERSIONS, "bad", "components")
+    shutil.copytree(os.path.join(root, VERSIONS, "v001", "components"), bad)
+    with open(os.path.join(bad, "pbc.csv"), "w") as f:
+        f.write("Subject,Component\nx,y\n")
+    with open(os.path.join(root, POINTER), "w") as f:
+        f.write("bad")
+    assert manager.refresh().version == "v001"
+    # Not retried: even once repaired, it waits for CURRENT to change
+    shutil.copy(os.path.join(root, VERSIONS, "v001", "components", "pbc.csv"), bad)
+    assert manager.refresh().version == "v001"
+
+    publish(2)
+    assert manager.refresh().version == "v002"
+
+
+def test_publish_rejects_a_broken_catalog(tmp_path, root, publish):
+    publish(1)
+    broken = tmp_path / "broken"
+    broken.mkdir()
+    (broken / "pbc.csv").write_text("Subject,Component\nx,y\n")
+    with pytest.raises(CatalogValidationError):
+        publish_snapshot(root, str(broken), version="v002")
+    assert read_pointer(root) == "v001"
+    assert sorted(os.listdir(os.path.join(root, VERSIONS))) == ["v001"]
+
+
+def test_publish_requires_every_catalog(tmp_path, root, publish):
+    publish(1)
+    partial = tmp_path / "partial"
+    partial.mkdir()
+    write_components(str(partial), 2)
+    (partial / "hsc.csv").unlink()
+    for components in (str(partial), "/nonexistent/dir"):
+        with pytest.raises(SnapshotError, match="hsc.csv" if components == str(partial) else "pbc.csv"):
+            publish_snapshot(root, components, version="v002")
+    assert read_pointer(root) == "v001"
+    assert sorted(os.listdir(os.path.join(root, VERSIONS))) == ["v001"]
+
+
+def test_version_missing_a_catalog_is_not_loaded(root, publish, manager):
+    publish(1)
+    assert manager.refresh().version == "v001"
+    shutil.copytree(os.path.join(root, VERSIONS, "v001"), os.path.join(root, VERSIONS, "v002"))
+    os.remove(os.path.join(root, VERSIONS, "v002", "components", "ea.csv"))
+    with pytest.raises(SnapshotError, match="ea.csv"):
+        Snapshot.load(root, "v002")
+    with open(os.path.join(root, POINTER), "w") as f:
+        f.write("v002")
+    assert manager.refresh().version == "v001"
+
+
+def test_snapshot_caches_are_per_snapshot(root, publish):
+    publish(1)
+    first = Snapshot.load(root, "v001")
+    assert first.catalog("pbc") is first.catalog("pbc")
+    assert Snapshot.load(root, "v001").catalog("pbc") is not first.catalog("pbc")
+    assert json.dumps(first.derived(("table", "pbc"), lambda: [1])) == "[1]"
@@ -0,0 +1,109 @@
+"""Downsampling for the region comparison view, and zoom windows across redraws."""
+
+from types import SimpleNamespace
+
+import dash
+import numpy as np
+import pytest
+
+import app
+from bench_callbacks import in_callback_context
+from timeseries import lttb_indices, minmax_indices, window_slice
+
+N = 1_000
+
+
+def spiky(n=N, seed=0):
+    y = np.random.default_rng(seed).normal(size=n).cumsum()
+    y[n // 3], y[2 * n // 3] = 1e3, -1e3
+    return np.arange(n, dtype=float), y
+
+
+def test_lttb_keeps_ends_spikes_and_order():
+    x, y = spiky()
+    idx = lttb_indices(x, y, 100)
+    assert len(idx) == 100
+    assert idx[0] == 0 and idx[-1] == N - 1
+    assert np.all(np.diff(idx) > 0)
+    assert {N // 3, 2 * N // 3} <= set(idx.tolist())
+
+
+def test_lttb_short_series_is_kept_whole():
+    x, y = spiky(50)
+    np.testing.assert_array_equal(lttb_indices(x, y, 100), np.arange(50))
+    np.testing.assert_array_equal(lttb_indices(x, np.vstack([y, y]), 100), [np.arange(50)] * 2)
+
+
+def test_lttb_batch_matches_single_series():
+    x, first = spiky(seed=1)
+    _, second = spiky(seed=2)
+    batched = lttb_indices(x, np.vstack([first, second]), 80)
+    np.testing.assert_array_equal(batched[0], lttb_indices(x, first, 80))
+    np.testing.assert_array_equal(batched[1], lttb_indices(x, second, 80))
+
+
+def test_minmax_keeps_extremes_and_skips_missing():
+    x, y = spiky()
+    y[10] = np.nan
+    idx = minmax_indices(x, y, 100)
+    assert len(idx) <= 100 and np.all(np.diff(idx) > 0)
+    assert {N // 3, 2 * N // 3} <= set(idx.tolist())
+    assert 10 not in idx
+    np.testing.assert_array_equal(minmax_indices(x[:20], y[:20], 100), np.arange(20))
+
+
+def test_window_slice_numeric_and_dates():
+    x = np.arange(10, dtype=float)
+    assert window_slice(x, None) == slice(None)
+    # One point either side of the window, clipped at the ends
+    assert x[window_slice(x, (3.5, 6))].tolist() == [3, 4, 5, 6, 7]
+    assert x[window_slice(x, (-5, 1))].tolist() == [0, 1, 2]
+
+    dates = np.arange("2021-01", "2021-07", dtype="datetime64[M]").astype("datetime64[D]")
+    keep = window_slice(dates, ("2021-02-15", "2021-04-01 00:00:00"))
+    assert dates[keep].astype(str).tolist() == ["2021-02-01", "2021-03-01", "2021-04-01", "2021-05-01"]
+
+
+@pytest.mark.parametrize("relayout, expected", [
+    (None, dash.no_update),
+    ({"autosize": True}, dash.no_update),
+    ({"xaxis.autorange": True}, None),
+    ({"xaxis3.range[0]": "2021-01-01", "xaxis3.range[1]": "2022-01-01"}, ("2021-01-01", "2022-01-01")),
+    ({"xaxis.range": [2, 5]}, (2, 5)),
+])
+def test_parse_zoom_window(relayout, expected):
+    assert app.parse_zoom_window(relayout) == expected
+
+
+class FakeHistory:
+    def regions(self, variable):
+        return ["AA", "BB"]
+
+    def series(self, variable, regions):
+        x = np.arange(N, dtype=float)
+        return {r: (x, np.sin(x / (k + 10))) for k, r in enumerate(regions)}
+
+
+def test_zoom_window_survives_variable_and_region_changes(monkeypatch):
+    snapshot = SimpleNamespace(history=FakeHistory())
+    monkeypatch.setattr(app, "current_snapshot", lambda: snapshot)
+
+    def update(trigger, variables, regions, relayout, window):
+        return in_callback_context(app.update_comparison, variables, regions, relayout, 1200, window,
+                                   triggered=[{"prop_id": f"{trigger}.value", "value": None}])
+
+    zoom = {"xaxis.range[0]": 100, "xaxis.range[1]": 200}
+    figure, window = update("compare-graph", ["a"], ["AA"], zoom, None)
+    assert window == (100, 200)
+
+    figure, window = update("compare-regions", ["a"], ["AA", "BB"], zoom, list(window))
+    assert window == (100, 200)
+    assert list(figure.layout.xaxis.range) == [100, 200]
+    assert all(99 <= trace.x.min() and trace.x.max() <= 201 for trace in figure.data)
+
+    figure, window = update("compare-variables", ["a", "b"], ["AA", "BB"], zoom, list(window))
+    assert window == (100, 200) and len(figure.data) == 4
+
+    figure, window = update("compare-graph", ["a", "b"], ["AA", "BB"], {"xaxis.autorange": True}, list(window))
+    assert window is None
+    assert max(trace.x.max() for trace in figure.data) == N - 1